@@ -2,6 +2,7 @@
 
 import sys
 import os
+import functools
 
 # Pre-import torch before any PyQt6/OpenGL imports.
 # On Windows, Qt's OpenGL initialization changes the DLL loader state,
@@ -12,8 +13,8 @@ try:
 except ImportError:
     pass
 
-from PyQt6.QtWidgets import (QApplication, QMainWindow, QDockWidget, QFileDialog, QMessageBox)
-from PyQt6.QtCore import Qt, QPoint
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QDockWidget, QFileDialog, QMessageBox, QWidget)
+from PyQt6.QtCore import Qt, QPoint, QByteArray
 from PyQt6.QtGui import QAction, QPalette, QColor, QFont, QImage, QKeySequence
 
 from src.core.brush_manager import BrushManager
@@ -21,31 +22,24 @@ from src.gui.canvas import CanvasWidget
 from src.gui.panels import LeftSidebar, LayerPanel, PropertyPanel
 from src.gui.dialogs import SettingsDialog, CanvasSizeDialog, AIGenerateDialog
 from src.gui.widgets import GeneratorStatusWidget, ChatPanelWidget
-from src.agent.agent_manager import AIAgentManager 
-from src.agent.generate import ImageGenerator
-from src.agent.chat_service import ChatRequestThread
 from src.core.logic import PaintLayer # For adding new layer
 from src.core.tools import ClipboardUtils, MagicWandTool
 from PIL import Image
 import io
 
-# High DPI Scaling
-if hasattr(Qt.ApplicationAttribute, 'AA_EnableHighDpiScaling'):
-    QApplication.setAttribute(Qt.ApplicationAttribute.AA_EnableHighDpiScaling, True)
-if hasattr(Qt.ApplicationAttribute, 'AA_UseHighDpiPixmaps'):
-    QApplication.setAttribute(Qt.ApplicationAttribute.AA_UseHighDpiPixmaps, True)
-
 #Qwen-Image-Layered API
 os.environ["REPLICATE_API_TOKEN"] = "r8_HKGBCxZipa0jGm7Ey3nQIaZ5xBs0kNN0Cf55i"
 
 class MainWindow(QMainWindow):
+    WINDOW_STATE_PATH = "config/window_state.bin"  # dock layout from QMainWindow.saveState
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("AiPainter V0.1")
         self.resize(1600, 900)
         self.gen_status = None
         
-        self.agent_manager = AIAgentManager()
+        self._agent_manager = None  # built on first access; see `agent_manager`
         self.ui_scale = 1.0
         
         # Apply theme first
@@ -53,15 +47,18 @@ class MainWindow(QMainWindow):
         
         self.brush_manager = BrushManager()
         self.canvas = CanvasWidget()
+        self.canvas.project_saved.connect(self._on_project_saved)
+        self.canvas.psd_imported.connect(self._on_psd_imported)
+        self.canvas.image_exported.connect(self._on_image_exported)
         self.setCentralWidget(self.canvas)
         
         self.create_actions()
         self.create_menubar()
         self.create_docks()
+        self._restore_window_state()
         
-        # AI Generator Backend
-        self.generator = ImageGenerator()
-        self.generator.generation_finished.connect(self.on_generation_finished)
+        # AI Generator Backend (created on first generation; see `generator`)
+        self._generator = None
         
         # AI Status Widget (Floating in bottom left)
         # Create as child of MainWindow so it floats above central widget
@@ -71,9 +68,47 @@ class MainWindow(QMainWindow):
         self.gen_status.hide()
         self._chat_thread = None
         self._chat_history = []
+        # Start file dialogs where the user last browsed instead of $HOME
+        self._last_dir = ""
+        self._settings_dialog = None
         
         self.statusBar().showMessage("Ready")
 
+    @property
+    def agent_manager(self):
+        # Deferred: nothing on the startup path needs the AI config/client
+        if self._agent_manager is None:
+            from src.agent.agent_manager import AIAgentManager
+            self._agent_manager = AIAgentManager()
+        return self._agent_manager
+
+    @property
+    def generator(self):
+        # Deferred: importing the generator pulls in replicate/requests
+        if self._generator is None:
+            from src.agent.generate import ImageGenerator
+            self._generator = ImageGenerator()
+            self._generator.generation_finished.connect(self.on_generation_finished)
+        return self._generator
+
+    def _restore_window_state(self):
+        if not os.path.exists(self.WINDOW_STATE_PATH):
+            return
+        try:
+            with open(self.WINDOW_STATE_PATH, "rb") as f:
+                self.restoreState(QByteArray(f.read()))
+        except Exception as e:
+            print(f"Error restoring window layout: {e}")
+
+    def closeEvent(self, event):
+        try:
+            os.makedirs(os.path.dirname(self.WINDOW_STATE_PATH), exist_ok=True)
+            with open(self.WINDOW_STATE_PATH, "wb") as f:
+                f.write(self.saveState().data())
+        except Exception as e:
+            print(f"Error saving window layout: {e}")
+        super().closeEvent(event)
+
     def resizeEvent(self, event):
         if event is not None:
             super().resizeEvent(event)
@@ -240,6 +275,7 @@ class MainWindow(QMainWindow):
         if len(self._chat_history) > 40:
             self._chat_history = self._chat_history[-40:]
 
+        from src.agent.chat_service import ChatRequestThread
         self._chat_thread = ChatRequestThread(
             user_text=text,
             history=self._chat_history,
@@ -253,8 +289,7 @@ class MainWindow(QMainWindow):
         
     def start_generation(self, prompt, neg, size):
         self.gen_status.start_loading()
-        # Force re-layout to ensure size is correct before moving
-        self.gen_status.adjustSize()
+        # start_loading() already resized the widget; just re-anchor it
         self.resizeEvent(None) 
         
         self.generator.generate(prompt, neg, size)
@@ -296,15 +331,15 @@ class MainWindow(QMainWindow):
         # Add to root (simple)
         self.canvas.root.add_child(new_layer)
         self.canvas.active_layer = new_layer
-        self.canvas.layer_structure_changed.emit()
+        self.canvas.schedule_layer_refresh()
         self.canvas.update()
         self.canvas.gl_canvas.end_history_action(before_state, "Insert AI Generated Layer")
         self.statusBar().showMessage("Image added as new layer.")
 
     def apply_ui_scale(self):
-        font = QApplication.font()
-        font.setPointSize(int(10 * self.ui_scale))
-        QApplication.setFont(font)
+        font = _ui_font(self.ui_scale)
+        if QApplication.font() != font:
+            QApplication.setFont(font)
 
     def create_actions(self):
         self.act_new = QAction("New Project...", self)
@@ -360,21 +395,23 @@ class MainWindow(QMainWindow):
         self.act_paste.setShortcutContext(Qt.ShortcutContext.ApplicationShortcut)
         self.act_paste.triggered.connect(self.on_paste)
 
+        # Bound directly to the canvas; no per-trigger lambda frame
+        gl = self.canvas.gl_canvas
         self.act_hsl = QAction("HSL Adjustment...", self)
-        self.act_hsl.triggered.connect(lambda: self.canvas.gl_canvas.open_adjustment("HSL"))
+        self.act_hsl.triggered.connect(functools.partial(gl.open_adjustment, "HSL"))
         
         self.act_contrast = QAction("Contrast...", self)
-        self.act_contrast.triggered.connect(lambda: self.canvas.gl_canvas.open_adjustment("Contrast"))
+        self.act_contrast.triggered.connect(functools.partial(gl.open_adjustment, "Contrast"))
         
         self.act_exposure = QAction("Exposure...", self)
-        self.act_exposure.triggered.connect(lambda: self.canvas.gl_canvas.open_adjustment("Exposure"))
+        self.act_exposure.triggered.connect(functools.partial(gl.open_adjustment, "Exposure"))
         
         self.act_blur = QAction("Gaussian Blur...", self)
-        self.act_blur.triggered.connect(lambda: self.canvas.gl_canvas.open_adjustment("Blur"))
+        self.act_blur.triggered.connect(functools.partial(gl.open_adjustment, "Blur"))
 
         # === Add Gradient Map Action ===
         self.act_grad_map = QAction("Gradient Map...", self)
-        self.act_grad_map.triggered.connect(lambda: self.canvas.gl_canvas.open_gradient_map())
+        self.act_grad_map.triggered.connect(gl.open_gradient_map)
 
     def create_menubar(self):
         bar = self.menuBar()
@@ -408,6 +445,7 @@ class MainWindow(QMainWindow):
 
     def create_docks(self):
         self.dock_left = QDockWidget("Tools", self)
+        self.dock_left.setObjectName("dock_left")  # key for saveState/restoreState
         self.dock_left.setAllowedAreas(Qt.DockWidgetArea.LeftDockWidgetArea | Qt.DockWidgetArea.RightDockWidgetArea)
         
         self.left_sidebar = LeftSidebar(
@@ -429,28 +467,31 @@ class MainWindow(QMainWindow):
         self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.dock_left)
         
         self.dock_layer = QDockWidget("Layers", self)
+        self.dock_layer.setObjectName("dock_layer")
         self.layer_panel = LayerPanel(self.canvas)
         self.dock_layer.setWidget(self.layer_panel)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.dock_layer)
         
         self.dock_prop = QDockWidget("Properties", self)
+        self.dock_prop.setObjectName("dock_prop")
         self.prop_panel = PropertyPanel(self.canvas)
         self.dock_prop.setWidget(self.prop_panel)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.dock_prop)
 
         self.dock_chat = QDockWidget("Chat", self)
+        self.dock_chat.setObjectName("dock_chat")
         self.dock_chat.setAllowedAreas(
             Qt.DockWidgetArea.LeftDockWidgetArea
             | Qt.DockWidgetArea.RightDockWidgetArea
             | Qt.DockWidgetArea.BottomDockWidgetArea
         )
-        self.chat_panel = ChatPanelWidget(self)
-        self.chat_panel.sendRequested.connect(self.on_chat_send)
-        self.chat_panel.btn_clear.clicked.connect(self._clear_chat_history)
-        self.dock_chat.setWidget(self.chat_panel)
+        # The chat page starts hidden; build its panel the first time it is shown.
+        self.chat_panel = None
+        self.dock_chat.setWidget(QWidget())
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.dock_chat)
         self.dock_chat.setFloating(True)
         self.dock_chat.hide()
+        self.dock_chat.visibilityChanged.connect(self._ensure_chat_panel)
         self.dock_chat.toggleViewAction().setText("Chat Page")
 
         view_menu = self.menuBar().addMenu("&View")
@@ -459,99 +500,125 @@ class MainWindow(QMainWindow):
         view_menu.addAction(self.dock_prop.toggleViewAction())
         view_menu.addAction(self.dock_chat.toggleViewAction())
 
+    def _ensure_chat_panel(self, visible=True):
+        if not visible or self.chat_panel is not None:
+            return
+        self.chat_panel = ChatPanelWidget(self)
+        self.chat_panel.sendRequested.connect(self.on_chat_send)
+        self.chat_panel.btn_clear.clicked.connect(self._clear_chat_history)
+        placeholder = self.dock_chat.widget()
+        self.dock_chat.setWidget(self.chat_panel)
+        if placeholder is not None:
+            placeholder.deleteLater()  # setWidget() does not free the widget it replaces
+
     def on_new_project(self):
         dlg = CanvasSizeDialog(self)
         if dlg.exec():
             vals = dlg.get_values()
-            self.canvas.doc_width = vals['width']
-            self.canvas.doc_height = vals['height']
-            self.canvas.root.children = []
-            self.canvas.initializeGL()
-            self.canvas.update()
+            self.canvas.reset_document(vals['width'], vals['height'])
+
+    def _remember_dir(self, path):
+        self._last_dir = os.path.dirname(path)
 
     def on_save_project(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save Project", "", "GL Project (*.glp)")
+        path, _ = QFileDialog.getSaveFileName(self, "Save Project", self._last_dir, "GL Project (*.glp)")
         if path:
             if not path.endswith(".glp"):
                 path += ".glp"
+            self._remember_dir(path)
+            self.statusBar().showMessage(f"Saving project: {path}...")
             self.canvas.save_project(path)
-            self.statusBar().showMessage(f"Project saved: {path}")
+
+    def _on_project_saved(self, path, error):
+        if error:
+            QMessageBox.warning(self, "Save Project", f"Failed to save {path}:\n{error}")
+            return
+        self.statusBar().showMessage(f"Project saved: {path}")
 
     def on_open_project(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Open Project", "", "GL Project (*.glp)")
+        path, _ = QFileDialog.getOpenFileName(self, "Open Project", self._last_dir, "GL Project (*.glp)")
         if path:
+            self._remember_dir(path)
             self.canvas.load_project(path)
             self.statusBar().showMessage(f"Project loaded: {path}")
 
     def on_open_image(self):
         filters = "Image Files (*.jpg *.jpeg *.png);;PNG Files (*.png);;JPEG Files (*.jpg *.jpeg);;All Files (*)"
-        paths, _ = QFileDialog.getOpenFileNames(self, "Import Image", "", filters)
+        paths, _ = QFileDialog.getOpenFileNames(self, "Import Image", self._last_dir, filters)
+        if paths:
+            self._remember_dir(paths[0])
         for path in paths:
             self.canvas.open_img(path)
 
 
     def on_import_psd(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Import PSD", "", "PSD Files (*.psd);;All Files (*)")
+        path, _ = QFileDialog.getOpenFileName(self, "Import PSD", self._last_dir, "PSD Files (*.psd);;All Files (*)")
         if path:
+            self._remember_dir(path)
+            self.statusBar().showMessage(f"Importing PSD: {path}...")
             self.canvas.import_psd(path)
 
+    def _on_psd_imported(self, path, error):
+        if error:
+            QMessageBox.warning(self, "Import PSD", f"Failed to import {path}:\n{error}")
+            return
+        self.statusBar().showMessage(f"PSD imported: {path}")
+
     def on_export_flat(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Export Flat Image", "", "PNG Files (*.png);;JPEG Files (*.jpg)")
+        path, _ = QFileDialog.getSaveFileName(self, "Export Flat Image", self._last_dir, "PNG Files (*.png);;JPEG Files (*.jpg)")
         if path:
             if not path.endswith(".png") and not path.endswith(".jpg"):
                 path += ".png"
+            self._remember_dir(path)
+            self.statusBar().showMessage(f"Exporting to {path}...")
             self.canvas.export_image(path)
-            self.statusBar().showMessage(f"Exported to {path}")
+
+    def _on_image_exported(self, path, error):
+        if error:
+            QMessageBox.warning(self, "Export Flat Image", f"Failed to export {path}:\n{error}")
+            return
+        self.statusBar().showMessage(f"Exported to {path}")
     
     def on_export_psd(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Export PSD", "", "PSD Files (*.psd);;All Files (*)")
+        path, _ = QFileDialog.getSaveFileName(self, "Export PSD", self._last_dir, "PSD Files (*.psd);;All Files (*)")
         if path:
+            self._remember_dir(path)
             self.canvas.export_psd(path)
             self.statusBar().showMessage(f"Exported to {path}")
 
     def on_settings(self):
-        dlg = SettingsDialog(self, 
-                             self.canvas.doc_width, 
-                             self.canvas.doc_height,
-                             self.ui_scale)
+        # Built once and refreshed on later opens; the five tabs are costly to rebuild.
+        dlg = self._settings_dialog
+        if dlg is None:
+            dlg = self._settings_dialog = SettingsDialog(self, 
+                                                         self.canvas.doc_width, 
+                                                         self.canvas.doc_height,
+                                                         self.ui_scale)
+        else:
+            dlg.load_values(self.canvas.doc_width, self.canvas.doc_height, self.ui_scale)
+            dlg.tabs.setCurrentIndex(0)
         if dlg.exec():
             vals = dlg.get_values()
+            new_w, new_h = int(vals['width']), int(vals['height'])
+            size_changed = new_w != int(self.canvas.doc_width) or new_h != int(self.canvas.doc_height)
+            # The spin box rounds to two decimals, so compare with a tolerance
+            scale_changed = abs(vals['ui_scale'] - self.ui_scale) >= 1e-6
             
-            if vals['width'] != self.canvas.doc_width or vals['height'] != self.canvas.doc_height:
-                self.canvas.resize_canvas_smart(vals['width'], vals['height'], vals['anchor'])
+            if size_changed:
+                self.canvas.resize_canvas_smart(new_w, new_h, vals['anchor'])
             
-            if vals['ui_scale'] != self.ui_scale:
+            if scale_changed:
                 self.ui_scale = vals['ui_scale']
                 set_light_theme(QApplication.instance(), self.ui_scale)
                 self.statusBar().showMessage(f"Settings applied. Scale: {self.ui_scale}x")
 
-def set_light_theme(app, scale=1.0):
-    # Base font size 
+@functools.lru_cache(maxsize=None)
+def _light_qss(scale):
+    """Light theme stylesheet for `scale`; built once per scale value."""
     base_size = int(10 * scale)
     base_padding = int(5 * scale)
     base_radius = int(3 * scale)
-    
-    font = QFont("Segoe UI", base_size)
-    app.setFont(font)
-
-    palette = QPalette()
-    palette.setColor(QPalette.ColorRole.Window, QColor(240, 240, 240))
-    palette.setColor(QPalette.ColorRole.WindowText, QColor(0, 0, 0))
-    palette.setColor(QPalette.ColorRole.Base, QColor(255, 255, 255))
-    palette.setColor(QPalette.ColorRole.AlternateBase, QColor(245, 245, 245))
-    palette.setColor(QPalette.ColorRole.ToolTipBase, QColor(255, 255, 220))
-    palette.setColor(QPalette.ColorRole.ToolTipText, QColor(0, 0, 0))
-    palette.setColor(QPalette.ColorRole.Text, QColor(0, 0, 0))
-    palette.setColor(QPalette.ColorRole.Button, QColor(240, 240, 240))
-    palette.setColor(QPalette.ColorRole.ButtonText, QColor(0, 0, 0))
-    palette.setColor(QPalette.ColorRole.BrightText, QColor(255, 0, 0))
-    palette.setColor(QPalette.ColorRole.Link, QColor(42, 130, 218))
-    palette.setColor(QPalette.ColorRole.Highlight, QColor(42, 130, 218))
-    palette.setColor(QPalette.ColorRole.HighlightedText, QColor(255, 255, 255))
-    app.setPalette(palette)
-    
-    # Dynamic Stylesheet based on scale
-    app.setStyleSheet(f"""
+    return f"""
         QMainWindow, QDialog, QDockWidget {{
             background-color: #f0f0f0;
             color: #000000;
@@ -624,7 +691,52 @@ def set_light_theme(app, scale=1.0):
             background: #cdcdcd;
             min-width: {int(20 * scale)}px;
         }}
-    """)
+    """
+
+_PALETTE_COLORS = (
+    (QPalette.ColorRole.Window, 240, 240, 240),
+    (QPalette.ColorRole.WindowText, 0, 0, 0),
+    (QPalette.ColorRole.Base, 255, 255, 255),
+    (QPalette.ColorRole.AlternateBase, 245, 245, 245),
+    (QPalette.ColorRole.ToolTipBase, 255, 255, 220),
+    (QPalette.ColorRole.ToolTipText, 0, 0, 0),
+    (QPalette.ColorRole.Text, 0, 0, 0),
+    (QPalette.ColorRole.Button, 240, 240, 240),
+    (QPalette.ColorRole.ButtonText, 0, 0, 0),
+    (QPalette.ColorRole.BrightText, 255, 0, 0),
+    (QPalette.ColorRole.Link, 42, 130, 218),
+    (QPalette.ColorRole.Highlight, 42, 130, 218),
+    (QPalette.ColorRole.HighlightedText, 255, 255, 255),
+)
+_LIGHT_PALETTE = None
+
+def _light_palette():
+    """The light theme palette, built on first use (needs a QGuiApplication)."""
+    global _LIGHT_PALETTE
+    if _LIGHT_PALETTE is None:
+        palette = QPalette()
+        for role, r, g, b in _PALETTE_COLORS:
+            palette.setColor(role, QColor.fromRgb(r, g, b))
+        _LIGHT_PALETTE = palette
+    return _LIGHT_PALETTE
+
+@functools.lru_cache(maxsize=None)
+def _ui_font(scale):
+    """Application font for `scale`; built once per scale value."""
+    return QFont("Segoe UI", int(10 * scale))
+
+def set_light_theme(app, scale=1.0):
+    # Setting an equal font still re-polishes every widget, so skip it
+    font = _ui_font(scale)
+    if app.font() != font:
+        app.setFont(font)
+
+    app.setPalette(_light_palette())
+    
+    # Dynamic Stylesheet based on scale; only re-parsed when it actually differs
+    qss = _light_qss(scale)
+    if app.styleSheet() != qss:
+        app.setStyleSheet(qss)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -1,6 +1,7 @@
 # src/core/logic.py
 
 import os
+import io
 import json
 import uuid
 import zipfile
@@ -25,6 +26,10 @@ class Node:
         node.parent = self
         self.children.append(node)
 
+    def insert_child(self, index, node):
+        node.parent = self
+        self.children.insert(index, node)
+
     def remove_child(self, node):
         if node in self.children:
             self.children.remove(node)
@@ -54,6 +59,8 @@ class PaintLayer(Node):
         self.texture = None
         self.fbo = None
         self.uuid = str(uuid.uuid4())
+        # Bumped whenever the texture contents change (used to invalidate thumbnails).
+        self.dirty_version = 0
         self.setup()
 
     def setup(self):
@@ -70,6 +77,9 @@ class PaintLayer(Node):
         glClearColor(0,0,0,0); glClear(GL_COLOR_BUFFER_BIT)
         glBindFramebuffer(GL_FRAMEBUFFER, 0)
     
+    def mark_dirty(self):
+        self.dirty_version += 1
+
     def add_child(self, node):
         print("Error: Cannot add child to PaintLayer")
         pass
@@ -108,6 +118,7 @@ class PaintLayer(Node):
             pil_image = pil_image.convert('RGBA')
         img_data = pil_image.transpose(Image.FLIP_TOP_BOTTOM).tobytes()
         glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE, img_data)
+        self.mark_dirty()
 
     def get_image(self):
         glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
@@ -116,6 +127,13 @@ class PaintLayer(Node):
         img = Image.frombytes("RGBA", (self.width, self.height), data)
         return img.transpose(Image.FLIP_TOP_BOTTOM)
 
+    def get_image_np(self):
+        """RGBA pixels as a read-only (H, W, 4) uint8 array view, top row first."""
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        data = glReadPixels(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        return np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 4)[::-1]
+
     def cleanup(self):
         if self.texture: glDeleteTextures([self.texture])
         if self.fbo: glDeleteFramebuffers(1, [self.fbo])
@@ -240,25 +258,45 @@ class UndoStack:
 
 class ProjectLogic:
     @staticmethod
-    def save_project(root_node, width, height, path):
-        import tempfile
-        with tempfile.TemporaryDirectory() as temp_dir:
-            project_data = { "width": width, "height": height, "root": root_node.to_dict() }
-            with open(os.path.join(temp_dir, "project.json"), "w") as f: json.dump(project_data, f, indent=2)
-            def save_layer_images(node):
-                if isinstance(node, PaintLayer):
-                    img = node.get_image()
-                    # --- 调试代码 ---
-                    save_path = os.path.join(temp_dir, f"{node.uuid}.png")
-                    print(f"正在保存图层: {node.name}, UUID: {node.uuid}, 路径: {save_path}")
-                    # ----------------
-                    img.save(os.path.join(temp_dir, f"{node.uuid}.png"))
-                if hasattr(node, 'children'):
-                    for child in node.children: save_layer_images(child)
-            save_layer_images(root_node)
-            with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files: zipf.write(os.path.join(root, file), file)
+    def snapshot_project(root_node, width, height):
+        """Read back everything a save needs; must run with the GL context current.
+
+        Returns (project_data, [(uuid, PIL.Image), ...]) which
+        `write_project` can encode and write from any thread.
+        """
+        project_data = { "width": width, "height": height, "root": root_node.to_dict() }
+        images = []
+        def collect_layer_images(node):
+            if isinstance(node, PaintLayer):
+                images.append((node.uuid, node.get_image()))
+            if hasattr(node, 'children'):
+                for child in node.children: collect_layer_images(child)
+        collect_layer_images(root_node)
+        return project_data, images
+
+    @staticmethod
+    def write_project(snapshot, path):
+        """Encode a `snapshot_project` result into a .glp archive at `path`."""
+        project_data, images = snapshot
+        # Build the archive next to `path` and swap it in only once it is complete,
+        # so a failed save never clobbers the previous good file.
+        tmp_path = path + ".tmp"
+        try:
+            # One 1 MiB buffer so the many small zip records land as few large writes
+            with open(tmp_path, "wb", buffering=1 << 20) as f, zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                zipf.writestr("project.json", json.dumps(project_data, indent=2))
+                for layer_uuid, img in images:
+                    buf = io.BytesIO()
+                    img.save(buf, format="PNG")
+                    # PNG data is already deflated; storing it skips a second pass
+                    zipf.writestr(f"{layer_uuid}.png", buf.getvalue(), compress_type=zipfile.ZIP_STORED)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
 
     @staticmethod
     def load_project(path):
@@ -317,19 +355,43 @@ class ProjectLogic:
             return None, 0, 0
 
     @staticmethod
-    def import_psd(path, current_width, current_height):
-        psd = PSDImage.open(path); width = psd.width; height = psd.height; root = GroupLayer("Root")
-        def process_psd_layer(psd_layer, parent_node):
+    def decode_psd(path):
+        """Decode a PSD into plain data; safe to call off the UI thread.
+
+        Returns (width, height, entries) where each entry is a dict with
+        "name", "visible", "opacity" and either "children" (groups) or
+        "image" (a document-sized PIL image), bottom layer first.
+        """
+        psd = PSDImage.open(path); width = psd.width; height = psd.height
+        def decode_layer(psd_layer):
+            entry = {"name": psd_layer.name, "visible": psd_layer.visible, "opacity": psd_layer.opacity / 255.0}
             if psd_layer.is_group():
-                grp = GroupLayer(psd_layer.name); grp.visible = psd_layer.visible; grp.opacity = psd_layer.opacity / 255.0
-                parent_node.add_child(grp)
-                for child in psd_layer: process_psd_layer(child, grp)
+                entry["children"] = [decode_layer(child) for child in psd_layer]
             else:
-                pil_img = psd_layer.composite(viewport=(0,0, width, height))
-                l = PaintLayer(width, height, psd_layer.name); l.visible = psd_layer.visible; l.opacity = psd_layer.opacity / 255.0
-                l.load_from_image(pil_img); parent_node.add_child(l)
-        for layer in reversed(list(psd)): process_psd_layer(layer, root)
-        return width, height, root
+                entry["image"] = psd_layer.composite(viewport=(0,0, width, height))
+            return entry
+        return width, height, [decode_layer(layer) for layer in reversed(list(psd))]
+
+    @staticmethod
+    def build_psd_tree(width, height, entries):
+        """Turn `decode_psd` entries into a layer tree; needs the GL context."""
+        root = GroupLayer("Root")
+        def build_node(entry, parent_node):
+            if "children" in entry:
+                node = GroupLayer(entry["name"])
+                for child in entry["children"]: build_node(child, node)
+            else:
+                node = PaintLayer(width, height, entry["name"])
+                node.load_from_image(entry.pop("image"))  # drop the decoded copy once uploaded
+            node.visible = entry["visible"]; node.opacity = entry["opacity"]
+            parent_node.add_child(node)
+        for entry in entries: build_node(entry, root)
+        return root
+
+    @staticmethod
+    def import_psd(path, current_width, current_height):
+        width, height, entries = ProjectLogic.decode_psd(path)
+        return width, height, ProjectLogic.build_psd_tree(width, height, entries)
     
     @staticmethod
     def create_group_from_images(images, names, doc_width, doc_height):
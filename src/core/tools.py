@@ -913,7 +913,7 @@ class TextTool(Tool):
             if ok and t:
                 l = TextLayer(self.canvas.doc_width, self.canvas.doc_height, text=t, x=int(layer_pos.x()), y=int(layer_pos.y()))
                 tgt = self.canvas.active_layer.parent if self.canvas.active_layer and self.canvas.active_layer.parent else self.canvas.root
-                tgt.add_child(l); self.canvas.active_layer = l; self.canvas.layer_structure_changed.emit(); self.canvas.update()
+                tgt.add_child(l); self.canvas.active_layer = l; self.canvas.schedule_layer_refresh(); self.canvas.update()
         elif event.button() == Qt.MouseButton.RightButton and isinstance(self.canvas.active_layer, TextLayer):
             s, ok = QInputDialog.getInt(self.canvas, "Size", "Size:", value=self.canvas.active_layer.font_size)
             if ok: 
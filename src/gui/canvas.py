@@ -4,7 +4,7 @@ import numpy as np
 from PIL import Image
 from PyQt6.QtOpenGLWidgets import QOpenGLWidget
 from PyQt6.QtWidgets import QWidget, QScrollBar, QGridLayout, QMenu, QApplication, QMessageBox
-from PyQt6.QtCore import Qt, pyqtSignal, QPointF, QRectF, QBuffer, QIODevice, QEvent
+from PyQt6.QtCore import Qt, pyqtSignal, QPointF, QRectF, QBuffer, QIODevice, QEvent, QTimer, QRunnable, QThreadPool
 from PyQt6.QtGui import QPainter, QColor, QPainterPath, QPen, QImage
 from OpenGL.GL import *
 from src.core.brush_manager import BrushConfig
@@ -23,13 +23,87 @@ import io
 import sys
 
 
+class _ProjectSaveJob(QRunnable):
+    """Encodes and writes a project snapshot off the UI thread."""
+
+    def __init__(self, done_signal, snapshot, path):
+        super().__init__()
+        self.done_signal = done_signal
+        self.snapshot = snapshot
+        self.path = path
+
+    def run(self):
+        try:
+            ProjectLogic.write_project(self.snapshot, self.path)
+        except Exception as e:
+            self.done_signal.emit(self.path, str(e))
+        else:
+            self.done_signal.emit(self.path, "")
+
+
+class _ImageExportJob(QRunnable):
+    """Encodes a flattened PIL image to disk off the UI thread."""
+
+    def __init__(self, done_signal, image, path):
+        super().__init__()
+        self.done_signal = done_signal
+        self.image = image
+        self.path = path
+
+    def run(self):
+        try:
+            ext = os.path.splitext(self.path)[1].lower()
+            fmt = Image.registered_extensions().get(ext, "PNG")
+            image = self.image
+            if fmt == "JPEG" and image.mode != "RGB":
+                # JPEG has no alpha; flatten onto white like the canvas background
+                bg = Image.new("RGBA", image.size, (255, 255, 255, 255))
+                image = Image.alpha_composite(bg, image.convert("RGBA")).convert("RGB")
+            # Encode fully in memory so a failed save never leaves a partial file behind
+            buf = io.BytesIO()
+            image.save(buf, format=fmt)
+            with open(self.path, "wb") as f:
+                f.write(buf.getbuffer())
+        except Exception as e:
+            self.done_signal.emit(self.path, str(e))
+        else:
+            self.done_signal.emit(self.path, "")
+
+
+class _PsdDecodeJob(QRunnable):
+    """Parses a PSD and composites its layers off the UI thread."""
+
+    def __init__(self, done_signal, path):
+        super().__init__()
+        self.done_signal = done_signal
+        self.path = path
+
+    def run(self):
+        try:
+            result = ProjectLogic.decode_psd(self.path)
+        except Exception as e:
+            self.done_signal.emit(self.path, None, str(e))
+        else:
+            self.done_signal.emit(self.path, result, "")
+
+
 class GLCanvas(QOpenGLWidget):
+    layer_structure_changing = pyqtSignal()  # tree edited; layer_structure_changed follows next turn
     layer_structure_changed = pyqtSignal()
     view_changed = pyqtSignal()
     brush_color_changed = pyqtSignal(list)
+    brush_changed = pyqtSignal(object)
+    project_saved = pyqtSignal(str, str)  # path, error message ("" on success)
+    psd_imported = pyqtSignal(str, str)   # path, error message ("" on success)
+    image_exported = pyqtSignal(str, str) # path, error message ("" on success)
+    _psd_decoded = pyqtSignal(str, object, str)
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Single worker so file writes never overlap and finish in request order
+        self._io_pool = QThreadPool(self)
+        self._io_pool.setMaxThreadCount(1)
+        self._psd_decoded.connect(self._on_psd_decoded)
         self.doc_width = 1920
         self.doc_height = 1080
         self.zoom = 1.0
@@ -37,8 +111,9 @@ class GLCanvas(QOpenGLWidget):
         
         self.root = GroupLayer("Root")
         self._active_layer = None
+        self._layer_refresh_pending = False
         
-        self.current_brush = None
+        self._current_brush = None
         self._brush_color = [0,0,0]
         self.brush_texture_id = None
         self.last_pos = None
@@ -60,6 +135,30 @@ class GLCanvas(QOpenGLWidget):
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         self.setMouseTracking(True)
 
+    def schedule_layer_refresh(self):
+        """Emit layer_structure_changed once on the next event-loop turn.
+
+        Several structure edits in the same turn (e.g. a batch import) then
+        cost a single layer panel rebuild.
+        """
+        if not self._layer_refresh_pending:
+            self._layer_refresh_pending = True
+            self.layer_structure_changing.emit()
+            QTimer.singleShot(0, self._flush_layer_refresh)
+
+    def _flush_layer_refresh(self):
+        self._layer_refresh_pending = False
+        self.layer_structure_changed.emit()
+
+    @property
+    def current_brush(self):
+        return self._current_brush
+
+    @current_brush.setter
+    def current_brush(self, config):
+        self._current_brush = config
+        self.brush_changed.emit(config)
+
     @property
     def brush_color(self):
         return self._brush_color
@@ -121,13 +220,13 @@ class GLCanvas(QOpenGLWidget):
 
     def perform_undo(self):
         if self.undo_stack.undo():
-            self.layer_structure_changed.emit()
+            self.schedule_layer_refresh()
             self.view_changed.emit()
             self.update()
 
     def perform_redo(self):
         if self.undo_stack.redo():
-            self.layer_structure_changed.emit()
+            self.schedule_layer_refresh()
             self.view_changed.emit()
             self.update()
 
@@ -403,7 +502,7 @@ class GLCanvas(QOpenGLWidget):
             self._activate_tool_from_name(state.get("tool_name"))
             self._restore_floating_state(state.get("floating_state"))
 
-            self.layer_structure_changed.emit()
+            self.schedule_layer_refresh()
             self.view_changed.emit()
             self.update()
         finally:
@@ -414,12 +513,25 @@ class GLCanvas(QOpenGLWidget):
         glBlendFunc(GL_ONE, GL_ONE_MINUS_SRC_ALPHA)
         
         if not self.root.children:
-            bg = PaintLayer(self.doc_width, self.doc_height, "Background")
-            self._fill_layer(bg, [1,1,1])
-            self.root.add_child(bg)
-            self.active_layer = bg
+            self._create_background_layer(self.doc_width, self.doc_height)
             
-        self.layer_structure_changed.emit()
+        self.schedule_layer_refresh()
+
+    def _create_background_layer(self, width, height):
+        """Add a white "Background" layer under root and make it active."""
+        bg = PaintLayer(width, height, "Background")
+        self._fill_layer(bg, [1,1,1])
+        self.root.add_child(bg)
+        self.active_layer = bg
+        return bg
+
+    def reset_document(self, width, height):
+        """Replace the layer tree with a single white background of the given size."""
+        self.makeCurrent()
+        self.doc_width = width; self.doc_height = height
+        self.root.children = []
+        self._create_background_layer(width, height)
+        self.schedule_layer_refresh(); self.update(); self.view_changed.emit()
 
     def resize_canvas_smart(self, new_w, new_h, anchor=(0.5, 0.5)):
         before_state = self.begin_history_action()
@@ -456,6 +568,7 @@ class GLCanvas(QOpenGLWidget):
         glClearColor(color[0], color[1], color[2], 1.0)
         glClear(GL_COLOR_BUFFER_BIT)
         glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        layer.mark_dirty()
 
     def paintGL(self):
         self.makeCurrent()
@@ -899,7 +1012,7 @@ class GLCanvas(QOpenGLWidget):
                 self.active_layer = ai_group.children[-1]
 
             # 5) Refresh UI state after insertion.
-            self.layer_structure_changed.emit() # Refresh layer tree panel.
+            self.schedule_layer_refresh() # Refresh layer tree panel.
             self.view_changed.emit()            # Refresh viewport-dependent UI state.
             self.update()                       # Trigger canvas repaint.
             self.end_history_action(before_state, "AI Layered Generation")
@@ -1469,7 +1582,7 @@ class GLCanvas(QOpenGLWidget):
         new_layer.parent = parent
 
         self.active_layer = new_layer
-        self.layer_structure_changed.emit()
+        self.schedule_layer_refresh()
         self.update()
         self.end_history_action(before_state, f"Insert {layer_name}")
 
@@ -1568,12 +1681,17 @@ class GLCanvas(QOpenGLWidget):
                     if res: return res
                 return None
             if self.root.children: self.active_layer = find_first(self.root)
-            self.layer_structure_changed.emit(); self.update(); self.view_changed.emit()
+            self.schedule_layer_refresh(); self.update(); self.view_changed.emit()
         except Exception as e: print(e)
 
     def save_project(self, path):
+        """Snapshot the layers here, then write the file in the background.
+
+        Completion is reported through `project_saved`.
+        """
         self.makeCurrent()
-        ProjectLogic.save_project(self.root, self.doc_width, self.doc_height, path)
+        snapshot = ProjectLogic.snapshot_project(self.root, self.doc_width, self.doc_height)
+        self._io_pool.start(_ProjectSaveJob(self.project_saved, snapshot, path))
 
     def open_img(self, path):
         try:
@@ -1607,23 +1725,41 @@ class GLCanvas(QOpenGLWidget):
             # Add to layer tree
             self.root.add_child(new_layer)
             self.active_layer = new_layer
-            self.layer_structure_changed.emit()
+            self.schedule_layer_refresh()
             self.update()
             self.end_history_action(before_state, "Import Image")
         except Exception as e:
             print(f"Error importing image: {e}")
 
     def import_psd(self, path):
-        try:
-            before_state = self.begin_history_action()
-            self.makeCurrent()
-            width, height, root = ProjectLogic.import_psd(path, self.doc_width, self.doc_height)
-            self.doc_width = width; self.doc_height = height; self.root = root
-            self.layer_structure_changed.emit(); self.update(); self.view_changed.emit()
-            self.end_history_action(before_state, "Import PSD")
-        except Exception as e: print(e)
+        """Decode `path` in the background; layers are uploaded when it is done.
+
+        Completion is reported through `psd_imported`.
+        """
+        self._io_pool.start(_PsdDecodeJob(self._psd_decoded, path))
+
+    def _on_psd_decoded(self, path, result, error):
+        if not error:
+            try:
+                before_state = self.begin_history_action()
+                self.makeCurrent()
+                width, height, entries = result
+                root = ProjectLogic.build_psd_tree(width, height, entries)
+                self.doc_width = width; self.doc_height = height; self.root = root
+                self.schedule_layer_refresh(); self.update(); self.view_changed.emit()
+                self.end_history_action(before_state, "Import PSD")
+            except Exception as e:
+                error = str(e)
+        self.psd_imported.emit(path, error)
 
     def export_image(self, path):
+        """Render the flattened document here and encode it in the background.
+
+        Completion is reported through `image_exported`.
+        """
+        self._io_pool.start(_ImageExportJob(self.image_exported, self._render_flat_image(), path))
+
+    def _render_flat_image(self):
         self.makeCurrent()
         fbo = glGenFramebuffers(1)
         tex = glGenTextures(1)
@@ -1651,8 +1787,8 @@ class GLCanvas(QOpenGLWidget):
         debug_nodes(self.root)
         self._render_node(self.root)
         data = glReadPixels(0, 0, self.doc_width, self.doc_height, GL_RGBA, GL_UNSIGNED_BYTE)
-        Image.frombytes("RGBA", (self.doc_width, self.doc_height), data).transpose(Image.FLIP_TOP_BOTTOM).save(path)
         glDeleteFramebuffers(1, [fbo]); glDeleteTextures([tex]); glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        return Image.frombytes("RGBA", (self.doc_width, self.doc_height), data).transpose(Image.FLIP_TOP_BOTTOM)
 
     def capture_visible_image(self):
         """Render currently visible layers to a PIL RGBA image."""
@@ -1898,7 +2034,7 @@ class GLCanvas(QOpenGLWidget):
         for i in range(steps):
             cx = self.last_pos.x() + dx * i; cy = self.last_pos.y() + dy * i; hs = current_size / 2
             glTexCoord2f(0,0); glVertex2f(cx-hs, cy-hs); glTexCoord2f(0,1); glVertex2f(cx-hs, cy+hs); glTexCoord2f(1,1); glVertex2f(cx+hs, cy+hs); glTexCoord2f(1,0); glVertex2f(cx+hs, cy-hs)
-        glEnd(); glBindFramebuffer(GL_FRAMEBUFFER, 0); self.update()
+        glEnd(); glBindFramebuffer(GL_FRAMEBUFFER, 0); self.active_layer.mark_dirty(); self.update()
 
     def wheelEvent(self, event):
         delta = event.angleDelta().y()
@@ -1927,8 +2063,18 @@ class CanvasWidget(QWidget):
     @property
     def brush_color_changed(self): return self.gl_canvas.brush_color_changed
     @property
+    def brush_changed(self): return self.gl_canvas.brush_changed
+    @property
+    def layer_structure_changing(self): return self.gl_canvas.layer_structure_changing
+    @property
     def layer_structure_changed(self): return self.gl_canvas.layer_structure_changed
     @property
+    def project_saved(self): return self.gl_canvas.project_saved
+    @property
+    def psd_imported(self): return self.gl_canvas.psd_imported
+    @property
+    def image_exported(self): return self.gl_canvas.image_exported
+    @property
     def doc_width(self): return self.gl_canvas.doc_width
     @doc_width.setter
     def doc_width(self, v): self.gl_canvas.doc_width = v
@@ -1953,6 +2099,7 @@ class CanvasWidget(QWidget):
     @property
     def stabilizer(self): return self.gl_canvas.stabilizer
     def initializeGL(self): self.gl_canvas.initializeGL()
+    def reset_document(self, width, height): self.gl_canvas.reset_document(width, height)
     def update(self): super().update(); self.gl_canvas.update()
     def import_psd(self, path): self.gl_canvas.import_psd(path)
     def open_img(self,path): self.gl_canvas.open_img(path)
@@ -1965,6 +2112,7 @@ class CanvasWidget(QWidget):
     def load_project(self, path): self.gl_canvas.load_project(path)
     def set_tool(self, name): self.gl_canvas.set_tool(name)
     def make_current(self): self.gl_canvas.makeCurrent()
+    def schedule_layer_refresh(self): self.gl_canvas.schedule_layer_refresh()
     def update_scrollbars(self):
         self.h_bar.blockSignals(True); self.v_bar.blockSignals(True)
         vw = self.gl_canvas.width(); vh = self.gl_canvas.height()
@@ -2,7 +2,7 @@
 
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QSpinBox, 
                              QDialogButtonBox, QTabWidget, QWidget, QDoubleSpinBox, 
-                             QLabel, QGridLayout, QToolButton, QPushButton, QButtonGroup, 
+                             QLabel, QToolButton, QPushButton, 
                              QLineEdit, QMessageBox, QTextEdit, QHBoxLayout, QApplication,
                              QSlider, QCheckBox, QRadioButton, QScrollArea, QFrame,
                              QSizePolicy)
@@ -13,7 +13,7 @@ import os
 import numpy as np
 from PIL import Image
 from src.agent.agent_manager import AIAgentManager
-from src.gui.widgets import GradientSlider, ColorPickerWidget
+from src.gui.widgets import GradientSlider, ColorPickerWidget, _CoalescedSetter
 from src.core.processor import ImageProcessor
 
 # === Adjustment Dialog (HSL, Contrast, etc.) ===
@@ -93,9 +93,11 @@ class GradientMapDialog(QDialog):
         layout.addWidget(self.slider)
         
         # Connections
+        self._stop_color_setter = _CoalescedSetter(self.slider.set_current_stop_color)
+        self.slider.stopSelected.connect(self._stop_color_setter.sync)
         self.slider.stopSelected.connect(self.color_picker.set_color)
         self.slider.gradientChanged.connect(self.on_gradient_changed)
-        self.color_picker.colorChanged.connect(self.slider.set_current_stop_color)
+        self.color_picker.colorChanged.connect(self._stop_color_setter)
         
         # Buttons
         btns = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
@@ -124,40 +126,58 @@ class GradientMapDialog(QDialog):
 
 # === Anchor Selection Widget (for Canvas Resize) ===
 class AnchorWidget(QWidget):
+    """3x3 anchor picker painted as a single widget from cached grid images."""
+
+    CELL = 32
+    _grid_images = {}  # active cell id -> QImage, shared by all instances
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.layout = QGridLayout(self)
-        self.layout.setSpacing(2)
-        self.btn_group = QButtonGroup(self)
-        self.buttons = []
-        
+        self.setFixedSize(self.CELL * 3, self.CELL * 3)
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+
+        self._active_id = 4 # Center cell checked by default
         self.anchor_val = (0.5, 0.5) # Default Center
 
-        positions = [(r, c) for r in range(3) for c in range(3)]
-        
-        for r, c in positions:
-            btn = QPushButton()
-            btn.setCheckable(True)
-            btn.setFixedSize(30, 30)
-            btn.setStyleSheet("""
-                QPushButton { background-color: #ddd; border: 1px solid #999; }
-                QPushButton:checked { background-color: #444; border: 1px solid #000; }
-            """)
-            self.layout.addWidget(btn, r, c)
-            self.btn_group.addButton(btn, r * 3 + c)
-            
-            # Center button checked by default
-            if r == 1 and c == 1:
-                btn.setChecked(True)
+    @classmethod
+    def _grid_image(cls, active_id):
+        img = cls._grid_images.get(active_id)
+        if img is None:
+            size = cls.CELL * 3
+            img = QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+            img.fill(Qt.GlobalColor.transparent)
+            p = QPainter(img)
+            for cell_id in range(9):
+                r, c = divmod(cell_id, 3)
+                x, y = c * cls.CELL + 1, r * cls.CELL + 1
+                w = h = cls.CELL - 2 # 2px gap between cells
+                checked = cell_id == active_id
+                p.fillRect(x, y, w, h, QColor("#000") if checked else QColor("#999"))
+                p.fillRect(x + 1, y + 1, w - 2, h - 2, QColor("#444") if checked else QColor("#ddd"))
+            p.end()
+            cls._grid_images[active_id] = img
+        return img
 
-        self.btn_group.idClicked.connect(self._on_click)
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawImage(0, 0, self._grid_image(self._active_id))
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.MouseButton.LeftButton:
+            return
+        pos = event.position()
+        c = min(2, max(0, int(pos.x()) // self.CELL))
+        r = min(2, max(0, int(pos.y()) // self.CELL))
+        self._on_click(r * 3 + c)
 
     def _on_click(self, id):
+        self._active_id = id
         r, c = divmod(id, 3)
         # Map 0,1,2 to 0.0, 0.5, 1.0
         y = r / 2.0
         x = c / 2.0
         self.anchor_val = (x, y)
+        self.update()
 
     def get_anchor(self):
         return self.anchor_val
@@ -180,8 +200,8 @@ class SettingsDialog(QDialog):
         layout_img = QVBoxLayout(self.tab_image)
         
         form_img = QFormLayout()
-        self.spin_w = QSpinBox(); self.spin_w.setRange(1, 16384); self.spin_w.setValue(current_width)
-        self.spin_h = QSpinBox(); self.spin_h.setRange(1, 16384); self.spin_h.setValue(current_height)
+        self.spin_w = QSpinBox(); self.spin_w.setRange(1, 16384)
+        self.spin_h = QSpinBox(); self.spin_h.setRange(1, 16384)
         form_img.addRow("Width (px):", self.spin_w)
         form_img.addRow("Height (px):", self.spin_h)
         layout_img.addLayout(form_img)
@@ -200,7 +220,6 @@ class SettingsDialog(QDialog):
         self.spin_ui_scale = QDoubleSpinBox()
         self.spin_ui_scale.setRange(0.5, 2.0)
         self.spin_ui_scale.setSingleStep(0.1)
-        self.spin_ui_scale.setValue(current_scale)
         self.spin_ui_scale.setSuffix("x")
         
         form_ui.addRow("UI Scale (0.5 - 2.0):", self.spin_ui_scale)
@@ -219,11 +238,11 @@ class SettingsDialog(QDialog):
         layout_ai.addWidget(conn_label)
         
         form_conn = QFormLayout()
-        self.txt_base_url = QLineEdit(self.agent_manager.base_url)
+        self.txt_base_url = QLineEdit()
         self.txt_base_url.setPlaceholderText("https://dashscope.aliyuncs.com/api/v1")
-        self.txt_api_key = QLineEdit(self.agent_manager.api_key)
+        self.txt_api_key = QLineEdit()
         self.txt_api_key.setEchoMode(QLineEdit.EchoMode.Password)
-        self.txt_proxy = QLineEdit(self.agent_manager.proxy)
+        self.txt_proxy = QLineEdit()
         self.txt_proxy.setPlaceholderText("e.g. http://127.0.0.1:7890")
         
         form_conn.addRow("Base URL:", self.txt_base_url)
@@ -247,27 +266,27 @@ class SettingsDialog(QDialog):
 
         form_models = QFormLayout()
 
-        self.txt_generate_model = QLineEdit(self.agent_manager.generate_model)
+        self.txt_generate_model = QLineEdit()
         self.txt_generate_model.setPlaceholderText("e.g. qwen-image-2.0, wanx2.1-t2i-plus")
         form_models.addRow("Generate (Text→Image):", self.txt_generate_model)
 
-        self.txt_edit_model = QLineEdit(self.agent_manager.edit_model)
+        self.txt_edit_model = QLineEdit()
         self.txt_edit_model.setPlaceholderText("e.g. qwen-image-2.0")
         form_models.addRow("Edit (Image→Image):", self.txt_edit_model)
 
-        self.txt_inpaint_model = QLineEdit(self.agent_manager.inpaint_model)
+        self.txt_inpaint_model = QLineEdit()
         self.txt_inpaint_model.setPlaceholderText("e.g. wanx2.1-imageedit")
         form_models.addRow("Inpaint (Mask Edit):", self.txt_inpaint_model)
 
-        self.txt_layered_model = QLineEdit(self.agent_manager.layered_model)
+        self.txt_layered_model = QLineEdit()
         self.txt_layered_model.setPlaceholderText("e.g. qwen/qwen-image-layered")
         form_models.addRow("Layered (Replicate):", self.txt_layered_model)
 
-        self.txt_chat_model = QLineEdit(self.agent_manager.chat_model)
+        self.txt_chat_model = QLineEdit()
         self.txt_chat_model.setPlaceholderText("e.g. qwen3.5-plus")
         form_models.addRow("Chat (Assistant):", self.txt_chat_model)
 
-        self.txt_replicate_key = QLineEdit(self.agent_manager.replicate_api_key)
+        self.txt_replicate_key = QLineEdit()
         self.txt_replicate_key.setEchoMode(QLineEdit.EchoMode.Password)
         self.txt_replicate_key.setPlaceholderText("Replicate API Token (r8_...)")
         form_models.addRow("Replicate API Key:", self.txt_replicate_key)
@@ -281,7 +300,6 @@ class SettingsDialog(QDialog):
         self.txt_chat_system_prompt = QTextEdit()
         self.txt_chat_system_prompt.setPlaceholderText("Default behavior prompt for the chat assistant.")
         self.txt_chat_system_prompt.setMaximumHeight(120)
-        self.txt_chat_system_prompt.setPlainText(self.agent_manager.chat_system_prompt)
         layout_ai.addWidget(self.txt_chat_system_prompt)
 
         btn_reset_models = QPushButton("Reset to Defaults")
@@ -309,25 +327,21 @@ class SettingsDialog(QDialog):
         self.txt_auto_sketch_prompt = QTextEdit()
         self.txt_auto_sketch_prompt.setPlaceholderText("Prompt for Auto Sketch...")
         self.txt_auto_sketch_prompt.setMaximumHeight(80)
-        self.txt_auto_sketch_prompt.setPlainText(self.agent_manager.auto_sketch_prompt)
         layout_prompts.addWidget(self.txt_auto_sketch_prompt)
 
         layout_prompts.addWidget(QLabel("Auto Color Prompt:"))
         self.txt_auto_color_prompt = QTextEdit()
         self.txt_auto_color_prompt.setPlaceholderText("Prompt for Auto Color...")
         self.txt_auto_color_prompt.setMaximumHeight(80)
-        self.txt_auto_color_prompt.setPlainText(self.agent_manager.auto_color_prompt)
         layout_prompts.addWidget(self.txt_auto_color_prompt)
 
         layout_prompts.addWidget(QLabel("Auto Optimize Prompt:"))
         self.txt_auto_optimize_prompt = QTextEdit()
         self.txt_auto_optimize_prompt.setPlaceholderText("Prompt for Auto Optimize...")
         self.txt_auto_optimize_prompt.setMaximumHeight(80)
-        self.txt_auto_optimize_prompt.setPlainText(self.agent_manager.auto_optimize_prompt)
         layout_prompts.addWidget(self.txt_auto_optimize_prompt)
 
         self.cb_auto_remove_white_bg = QCheckBox("Auto Remove White Background on result")
-        self.cb_auto_remove_white_bg.setChecked(self.agent_manager.auto_remove_white_bg)
         self.cb_auto_remove_white_bg.setToolTip(
             "When enabled, Auto Sketch / Color / Optimize will automatically\n"
             "remove the white background from the AI result."
@@ -364,11 +378,11 @@ class SettingsDialog(QDialog):
         sr_label.setStyleSheet("font-weight: bold; margin-top: 8px;")
         layout_sam.addWidget(sr_label)
         form_sr = QFormLayout()
-        self.txt_sr_general_model_path = QLineEdit(self.agent_manager.superres_general_model_path)
+        self.txt_sr_general_model_path = QLineEdit()
         self.txt_sr_general_model_path.setPlaceholderText("e.g. models/RealESRGAN_x4plus.pth")
         form_sr.addRow("General Model:", self.txt_sr_general_model_path)
 
-        self.txt_sr_illustration_model_path = QLineEdit(self.agent_manager.superres_illustration_model_path)
+        self.txt_sr_illustration_model_path = QLineEdit()
         self.txt_sr_illustration_model_path.setPlaceholderText("e.g. models/realesr-animevideov3.pth")
         form_sr.addRow("Illustration Model:", self.txt_sr_illustration_model_path)
         layout_sam.addLayout(form_sr)
@@ -403,15 +417,60 @@ class SettingsDialog(QDialog):
         layout_sam.addStretch()
         self.tabs.addTab(self.tab_sam, "Local Models")
 
-        # Refresh SAM status
-        self._refresh_sam_status()
-
         # Buttons
         btns = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
         btns.accepted.connect(self.accept)
         btns.rejected.connect(self.reject)
         layout.addWidget(btns)
 
+        self.load_values(current_width, current_height, current_scale)
+
+    def load_values(self, current_width, current_height, current_scale):
+        """Fill the fields from the document and the saved AI config.
+
+        Split out of __init__ so the window can keep one dialog and refresh
+        it on each open instead of rebuilding all five tabs.
+        """
+        am = self.agent_manager
+        self.spin_w.setValue(current_width)
+        self.spin_h.setValue(current_height)
+        self.anchor_widget._on_click(4)
+        self.spin_ui_scale.setValue(current_scale)
+
+        self.txt_base_url.setText(am.base_url)
+        self.txt_api_key.setText(am.api_key)
+        self.txt_proxy.setText(am.proxy)
+        self.txt_generate_model.setText(am.generate_model)
+        self.txt_edit_model.setText(am.edit_model)
+        self.txt_inpaint_model.setText(am.inpaint_model)
+        self.txt_layered_model.setText(am.layered_model)
+        self.txt_chat_model.setText(am.chat_model)
+        self.txt_replicate_key.setText(am.replicate_api_key)
+        self.txt_chat_system_prompt.setPlainText(am.chat_system_prompt)
+
+        self.txt_auto_sketch_prompt.setPlainText(am.auto_sketch_prompt)
+        self.txt_auto_color_prompt.setPlainText(am.auto_color_prompt)
+        self.txt_auto_optimize_prompt.setPlainText(am.auto_optimize_prompt)
+        self.cb_auto_remove_white_bg.setChecked(am.auto_remove_white_bg)
+
+        self.txt_sr_general_model_path.setText(am.superres_general_model_path)
+        self.txt_sr_illustration_model_path.setText(am.superres_illustration_model_path)
+
+        # Refresh SAM status
+        self._refresh_sam_status()
+
+        # The dialog is reused: drop download progress left from a finished
+        # load, but keep it showing while a load is still running
+        try:
+            from src.agent.mobile_sam_service import MobileSAMService
+            loading = MobileSAMService.instance().is_loading
+        except ImportError:
+            loading = False
+        if not loading:
+            self._sam_progress_label.setText("")
+            self._sam_progress_label.setVisible(False)
+        self._sam_download_btn.setEnabled(not loading)
+
     def test_ai_connection(self):
         # Update manager temp with current UI values for testing
         self.agent_manager.base_url = self.txt_base_url.text()
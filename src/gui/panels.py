@@ -4,17 +4,27 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                              QTreeWidget, QTreeWidgetItem, QListWidget, QListWidgetItem, 
                              QGroupBox, QLabel, QSlider, QInputDialog, QFrame, QGridLayout,
                              QAbstractItemView, QMenu, QMessageBox, QSplitter, QScrollArea,
-                             QComboBox, QLineEdit, QFormLayout)
-from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QFont, QColor, QIcon, QPixmap, QImage
-from src.gui.widgets import ColorPickerWidget, PressureCurveEditor
+                             QComboBox, QLineEdit, QFormLayout, QTreeView)
+from PyQt6.QtCore import (Qt, QSize, QTimer, pyqtSignal, QAbstractItemModel, QModelIndex, QMimeData,
+                          QObject, QRunnable, QThreadPool)
+from PyQt6.QtGui import QFont, QColor, QIcon, QPixmap, QImage, QPixmapCache
+from src.gui.widgets import ColorPickerWidget, PressureCurveEditor, _CoalescedSetter
 from src.core.brush_manager import BrushConfig
 from src.core.logic import GroupLayer, PaintLayer, PaintCommand, TextLayer
 from src.gui.dialogs import AIGenerateDialog
 from src.core.processor import ImageProcessor
 import io
+import weakref
+import numpy as np
+
+# Shared by brush icons and layer thumbnails (KB)
+QPixmapCache.setCacheLimit(20480)
+
+# Applied once on LeftSidebar; section header labels opt in via objectName
+_SECTION_HEADER_STYLE = "QLabel#sectionHeader { font-weight: bold; color: #666; }"
 
 class BrushPanel(QWidget):
+    ROW_HEIGHT = 26  # fits the 24px tip icon; categories use it too so rows are uniform
     def __init__(self, brush_manager, on_brush_selected):
         super().__init__()
         self.brush_manager = brush_manager
@@ -22,7 +32,7 @@ class BrushPanel(QWidget):
         layout = QVBoxLayout(self); layout.setContentsMargins(5,5,5,5)
         
         lbl = QLabel("Brushes")
-        lbl.setStyleSheet("font-weight: bold; color: #666;")
+        lbl.setObjectName("sectionHeader")
         layout.addWidget(lbl)
 
         # REPLACED: QListWidget -> QTreeWidget for collapsible categories
@@ -30,12 +40,17 @@ class BrushPanel(QWidget):
         self.tree.setHeaderHidden(True)
         self.tree.setIndentation(15)
         self.tree.setIconSize(QSize(24, 24)) # Size for brush tips
+        self.tree.setUniformRowHeights(True)
         self.tree.itemClicked.connect(self._item_clicked)
+        self._collapsed_categories = set()
+        self.tree.itemCollapsed.connect(lambda item: self._collapsed_categories.add(item.text(0)))
+        self.tree.itemExpanded.connect(lambda item: self._collapsed_categories.discard(item.text(0)))
         layout.addWidget(self.tree)
         
         self.refresh_list()
 
     def refresh_list(self):
+        self.tree.setUpdatesEnabled(False)
         self.tree.clear()
         
         for cat in self.brush_manager.categories:
@@ -47,7 +62,7 @@ class BrushPanel(QWidget):
             cat_item = QTreeWidgetItem(self.tree)
             cat_item.setText(0, cat)
             cat_item.setBackground(0, QColor("#dcdcdc"))
-            cat_item.setExpanded(True) # Default expanded
+            cat_item.setSizeHint(0, QSize(0, self.ROW_HEIGHT))
             # Disable selection logic for category headers if desired, 
             # but QTreeWidget selection is handled in click event anyway.
 
@@ -55,19 +70,49 @@ class BrushPanel(QWidget):
                 item = QTreeWidgetItem(cat_item)
                 item.setText(0, brush.name)
                 item.setData(0, Qt.ItemDataRole.UserRole, brush)
+                item.setSizeHint(0, QSize(0, self.ROW_HEIGHT))
                 
                 # Create Icon from Texture
                 if brush.texture:
                     try:
-                        # Resize for icon
-                        thumb = brush.texture.resize((24, 24))
-                        # Convert L (Grayscale) to QImage
-                        data = thumb.tobytes("raw", "L")
-                        qimg = QImage(data, 24, 24, QImage.Format.Format_Grayscale8)
-                        item.setIcon(0, QIcon(QPixmap.fromImage(qimg)))
+                        item.setIcon(0, QIcon(self._brush_icon_pixmap(brush)))
                     except Exception:
                         pass # Fail silently for icon
 
+        # Default expanded; one expandAll() is far cheaper than per-item setExpanded
+        self.tree.blockSignals(True)
+        self.tree.expandAll()
+        for i in range(self.tree.topLevelItemCount()):
+            cat_item = self.tree.topLevelItem(i)
+            if cat_item.text(0) in self._collapsed_categories:
+                cat_item.setExpanded(False)
+        self.tree.blockSignals(False)
+        self.tree.setUpdatesEnabled(True)
+
+    @staticmethod
+    def _brush_icon_pixmap(brush):
+        """24x24 texture thumbnail, cached in QPixmapCache per brush texture."""
+        key = getattr(brush, "_icon_key", None)
+        if key is not None and getattr(brush, "_icon_texture", None) is brush.texture:
+            pm = QPixmapCache.find(key)
+            if pm is not None:
+                return pm
+
+        # Full-size grayscale QImage of the texture, built once per texture
+        if getattr(brush, "_full_qimage_texture", None) is not brush.texture:
+            tex = brush.texture if brush.texture.mode == "L" else brush.texture.convert("L")
+            w, h = tex.size
+            brush._full_qimage = QImage(tex.tobytes("raw", "L"), w, h, w, QImage.Format.Format_Grayscale8).copy()
+            brush._full_qimage_texture = brush.texture
+
+        # Resize for icon with Qt's scaler
+        qimg = brush._full_qimage.scaled(24, 24, Qt.AspectRatioMode.IgnoreAspectRatio,
+                                         Qt.TransformationMode.SmoothTransformation)
+        pm = QPixmap.fromImage(qimg)
+        brush._icon_key = QPixmapCache.insert(pm)
+        brush._icon_texture = brush.texture
+        return pm
+
     def _item_clicked(self, item, col):
         brush = item.data(0, Qt.ItemDataRole.UserRole)
         if isinstance(brush, BrushConfig):
@@ -81,6 +126,13 @@ class BrushPanel(QWidget):
         self.tree.clearSelection()
 
 class ToolsPanel(QWidget):
+    # Applied once to the button container; parsed once instead of per button
+    BUTTON_STYLE = (
+        "QPushButton { text-align: center; padding: 4px 6px; font-size: 12px; }"
+        "QPushButton:hover { background-color: #e0e0e0; }"
+        "QPushButton:checked { background-color: #c0d8f0; border: 1px solid #6aa0d0; }"
+    )
+
     def __init__(self, on_tool_selected):
         super().__init__()
         self.on_tool_selected = on_tool_selected
@@ -90,7 +142,7 @@ class ToolsPanel(QWidget):
         layout.setContentsMargins(5, 5, 5, 5)
         
         lbl = QLabel("Tools")
-        lbl.setStyleSheet("font-weight: bold; color: #666;")
+        lbl.setObjectName("sectionHeader")
         layout.addWidget(lbl)
 
         # Compact 2-column tool buttons
@@ -105,13 +157,9 @@ class ToolsPanel(QWidget):
             "Liquify",
         ]
         
-        _normal_style = (
-            "QPushButton { text-align: center; padding: 4px 6px; font-size: 12px; }"
-            "QPushButton:hover { background-color: #e0e0e0; }"
-            "QPushButton:checked { background-color: #c0d8f0; border: 1px solid #6aa0d0; }"
-        )
-
-        tool_grid = QGridLayout()
+        tool_box = QWidget()
+        tool_box.setStyleSheet(self.BUTTON_STYLE)
+        tool_grid = QGridLayout(tool_box)
         tool_grid.setContentsMargins(0, 0, 0, 0)
         tool_grid.setHorizontalSpacing(6)
         tool_grid.setVerticalSpacing(6)
@@ -120,12 +168,11 @@ class ToolsPanel(QWidget):
             col = idx % 2
             btn = QPushButton(name)
             btn.setMinimumHeight(32)
-            btn.setStyleSheet(_normal_style)
             btn.setCheckable(True)
             btn.clicked.connect(lambda checked, n=name: self._on_tool_btn_clicked(n))
             tool_grid.addWidget(btn, row, col)
             self._tool_buttons[name] = btn
-        layout.addLayout(tool_grid)
+        layout.addWidget(tool_box)
 
         # === Magic Wand Options Panel (hidden by default) ===
         self.wand_panel = QGroupBox("AI Wand Options")
@@ -414,41 +461,38 @@ class ToolsPanel(QWidget):
         self._finish_liquify_session(apply=False)
 
 class AIPanel(QWidget):
+    BUTTON_STYLE = (
+        "QPushButton { text-align: center; padding: 4px 6px; font-size: 12px; }"
+        "QPushButton:hover { background-color: #e0e0e0; }"
+    )
+
     def __init__(self):
         super().__init__()
         layout = QVBoxLayout(self)
         layout.setContentsMargins(5,5,5,5)
         
         lbl = QLabel("AI Features")
-        lbl.setStyleSheet("font-weight: bold; color: #666;")
+        lbl.setObjectName("sectionHeader")
         layout.addWidget(lbl)
         
-        btn_style = (
-            "QPushButton { text-align: center; padding: 4px 6px; font-size: 12px; }"
-            "QPushButton:hover { background-color: #e0e0e0; }"
-        )
-
         self.btn_generate = QPushButton("Auto Generate")
         self.btn_generate.setMinimumHeight(32)
-        self.btn_generate.setStyleSheet(btn_style)
         self.btn_generate.clicked.connect(self.open_generator)
         self.btn_auto_sketch = QPushButton("Auto Sketch")
         self.btn_auto_sketch.setMinimumHeight(32)
-        self.btn_auto_sketch.setStyleSheet(btn_style)
 
         self.btn_auto_color = QPushButton("Auto Color")
         self.btn_auto_color.setMinimumHeight(32)
-        self.btn_auto_color.setStyleSheet(btn_style)
 
         self.btn_auto_optimize = QPushButton("Auto Optimize")
         self.btn_auto_optimize.setMinimumHeight(32)
-        self.btn_auto_optimize.setStyleSheet(btn_style)
 
         self.btn_auto_resolution = QPushButton("Auto Resolution")
         self.btn_auto_resolution.setMinimumHeight(32)
-        self.btn_auto_resolution.setStyleSheet(btn_style)
 
-        ai_grid = QGridLayout()
+        ai_box = QWidget()
+        ai_box.setStyleSheet(self.BUTTON_STYLE)
+        ai_grid = QGridLayout(ai_box)
         ai_grid.setContentsMargins(0, 0, 0, 0)
         ai_grid.setHorizontalSpacing(6)
         ai_grid.setVerticalSpacing(6)
@@ -457,7 +501,7 @@ class AIPanel(QWidget):
         ai_grid.addWidget(self.btn_auto_color, 1, 0)
         ai_grid.addWidget(self.btn_auto_optimize, 1, 1)
         ai_grid.addWidget(self.btn_auto_resolution, 2, 0, 1, 2)
-        layout.addLayout(ai_grid)
+        layout.addWidget(ai_box)
 
         # Auto Color inline options (left panel, editable text fields)
         self.auto_color_opts = QGroupBox("Auto Color Options")
@@ -496,6 +540,7 @@ class LeftSidebar(QWidget):
         super().__init__()
         self._canvas = canvas
         self._original_tool_cb = on_tool_selected
+        self.setStyleSheet(_SECTION_HEADER_STYLE)
         
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -575,11 +620,334 @@ class LeftSidebar(QWidget):
         line.setStyleSheet("background-color: #ccc;")
         layout.addWidget(line)
 
+class LayerModel(QAbstractItemModel):
+    """Item model over the canvas layer tree.
+
+    Rows are the logical children in reverse order (top layer first), and
+    indexes point straight at the GroupLayer/PaintLayer nodes.
+    """
+    MIME_TYPE = "application/x-aipainter-layer-node"
+    ROW_HEIGHT = 34  # fits the 32px thumbnail; groups use it too so rows are uniform
+    thumbnailNeeded = pyqtSignal(object)       # PaintLayer whose cached thumbnail is missing/stale
+    visibilityToggled = pyqtSignal(object, bool)
+
+    def __init__(self, canvas, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        # Indexes only carry a raw pointer; keep every node handed out alive until the next reset
+        self._alive = {}
+        self._resetting = False
+
+    def _create(self, row, node):
+        self._alive[id(node)] = node
+        return self.createIndex(row, 0, node)
+
+    def node_from_index(self, index):
+        return index.internalPointer() if index.isValid() else self.canvas.root
+
+    def index_for_node(self, node):
+        if node is None or node is self.canvas.root:
+            return QModelIndex()
+        parent = node.parent
+        if parent is None:
+            return QModelIndex()
+        try:
+            i = parent.children.index(node)
+        except ValueError:
+            return QModelIndex()  # detached from its old parent
+        return self._create(len(parent.children) - 1 - i, node)
+
+    # --- QAbstractItemModel interface ---
+    def index(self, row, column, parent=QModelIndex()):
+        if column != 0 or row < 0:
+            return QModelIndex()
+        children = self.node_from_index(parent).children
+        if row >= len(children):
+            return QModelIndex()
+        return self._create(row, children[len(children) - 1 - row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.index_for_node(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = self.node_from_index(parent)
+        return len(node.children) if isinstance(node, GroupLayer) else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.ItemIsDropEnabled
+        flags = (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable |
+                 Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsDragEnabled)
+        if isinstance(index.internalPointer(), GroupLayer):
+            flags |= Qt.ItemFlag.ItemIsDropEnabled
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"> {node.name}" if isinstance(node, GroupLayer) else node.name
+        if role == Qt.ItemDataRole.UserRole:
+            return node
+        if role == Qt.ItemDataRole.CheckStateRole:
+            return Qt.CheckState.Checked if node.visible else Qt.CheckState.Unchecked
+        if role == Qt.ItemDataRole.DecorationRole and isinstance(node, PaintLayer):
+            return self._thumbnail(node)
+        if role == Qt.ItemDataRole.BackgroundRole and isinstance(node, GroupLayer):
+            return QColor("#eaeaea")
+        if role == Qt.ItemDataRole.SizeHintRole:
+            return QSize(0, self.ROW_HEIGHT)
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.CheckStateRole:
+            return False
+        # The panel applies the change (inside a history action) and reports back via node_changed
+        self.visibilityToggled.emit(index.internalPointer(), Qt.CheckState(value) == Qt.CheckState.Checked)
+        return True
+
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction
+
+    def mimeTypes(self):
+        return [self.MIME_TYPE]
+
+    def mimeData(self, indexes):
+        nodes = [index.internalPointer() for index in indexes if index.isValid()]
+        if not nodes:
+            return None
+        mime = QMimeData()
+        mime.setData(self.MIME_TYPE, ",".join(str(id(n)) for n in nodes).encode())
+        return mime
+
+    def node_from_mime(self, mime):
+        if mime is None or not mime.hasFormat(self.MIME_TYPE):
+            return None
+        ids = bytes(mime.data(self.MIME_TYPE)).decode().split(",")
+        return self._alive.get(int(ids[0])) if ids and ids[0] else None
+
+    # --- Thumbnails ---
+    def _thumbnail(self, node):
+        """Cached thumbnail pixmap; asks for regeneration when missing or stale."""
+        key = getattr(node, "_thumb_key", None)
+        pixmap = QPixmapCache.find(key) if key is not None else None
+        if pixmap is None or getattr(node, "_thumb_version", None) != node.dirty_version:
+            self.thumbnailNeeded.emit(node)
+        return pixmap
+
+    # --- Updates from the panel ---
+    def reset(self):
+        self.begin_reset()
+        self.end_reset()
+
+    def begin_reset(self):
+        """Start a reset for a tree edit made behind the model's back.
+
+        Views drop their indexes right away; `end_reset` finishes it once the
+        tree has settled. Row signals are suppressed in between.
+        """
+        if not self._resetting:
+            self._resetting = True
+            self.beginResetModel()
+
+    def end_reset(self):
+        self.begin_reset()
+        self._alive = {}
+        self._resetting = False
+        self.endResetModel()
+
+    def node_changed(self, node, roles=()):
+        if self._resetting:
+            return
+        index = self.index_for_node(node)
+        if index.isValid():
+            self.dataChanged.emit(index, index, list(roles))
+
+    def subtree_changed(self, group, roles=()):
+        """Emit dataChanged for every descendant row of `group` (one range per group)."""
+        if self._resetting:
+            return
+        roles = list(roles)
+        stack = [group]
+        while stack:
+            grp = stack.pop()
+            count = len(grp.children)
+            if count:
+                parent_index = self.index_for_node(grp)
+                self.dataChanged.emit(self.index(0, 0, parent_index), self.index(count - 1, 0, parent_index), roles)
+            stack.extend(c for c in grp.children if isinstance(c, GroupLayer))
+
+    def add_node(self, parent, node):
+        """Append `node` to `parent` (it becomes the top row)."""
+        if self._resetting:
+            parent.add_child(node)
+            return
+        self.beginInsertRows(self.index_for_node(parent), 0, 0)
+        parent.add_child(node)
+        self.endInsertRows()
+
+    def remove_node(self, node):
+        if self._resetting:
+            if node.parent is None:
+                return False
+            node.parent.remove_child(node)
+            return True
+        index = self.index_for_node(node)
+        if not index.isValid():
+            return False
+        self.beginRemoveRows(index.parent(), index.row(), index.row())
+        node.parent.remove_child(node)
+        self.endRemoveRows()
+        return True
+
+    def can_move(self, node, parent_index, row):
+        """Whether `move_node(node, parent_index, row)` would change the tree."""
+        if self._resetting:
+            return False  # indexes from the view are stale until the pending reset ends
+        new_parent = self.node_from_index(parent_index)
+        if not isinstance(new_parent, GroupLayer):
+            return False
+        # A group cannot be moved into itself or one of its descendants
+        p = new_parent
+        while p is not None:
+            if p is node:
+                return False
+            p = p.parent
+        src_index = self.index_for_node(node)
+        if not src_index.isValid():
+            return False
+        # Dropping right above or below itself in the same parent is a no-op
+        return not (node.parent is new_parent and row in (src_index.row(), src_index.row() + 1))
+
+    def move_node(self, node, parent_index, row):
+        """Move `node` to UI position `row` under `parent_index`."""
+        if not self.can_move(node, parent_index, row):
+            return False
+        new_parent = self.node_from_index(parent_index)
+        src_index = self.index_for_node(node)
+        src_row = src_index.row()
+        if not self.beginMoveRows(src_index.parent(), src_row, src_row, parent_index, row):
+            return False
+        old_parent = node.parent
+        old_parent.remove_child(node)
+        if new_parent is old_parent and row > src_row:
+            row -= 1
+        new_parent.insert_child(len(new_parent.children) - row, node)
+        self.endMoveRows()
+        return True
+
+class LayersTreeView(QTreeView):
+    """Layer tree view; internal drag & drop moves go through LayerModel.move_node."""
+    aboutToDrop = pyqtSignal()
+    dropped = pyqtSignal()
+
+    def dropEvent(self, event):
+        model = self.model()
+        node = model.node_from_mime(event.mimeData())
+        if node is None or event.source() is not self:
+            event.ignore()
+            return
+
+        index = self.indexAt(event.position().toPoint())
+        pos = self.dropIndicatorPosition()
+        if not index.isValid() or pos == QAbstractItemView.DropIndicatorPosition.OnViewport:
+            parent, row = QModelIndex(), model.rowCount(QModelIndex())
+        elif pos == QAbstractItemView.DropIndicatorPosition.OnItem:
+            parent, row = index, 0
+        elif pos == QAbstractItemView.DropIndicatorPosition.AboveItem:
+            parent, row = index.parent(), index.row()
+        else:
+            parent, row = index.parent(), index.row() + 1
+
+        if not model.can_move(node, parent, row):
+            # Into itself/a descendant, a no-op or a stale source: nothing to record
+            event.ignore()
+            self.setState(QAbstractItemView.State.NoState)
+            return
+        self.aboutToDrop.emit()
+        model.move_node(node, parent, row)
+        self.dropped.emit()
+
+        # Rows were already moved; reporting no action keeps the drag source from removing them
+        event.setDropAction(Qt.DropAction.IgnoreAction)
+        event.accept()
+        self.setState(QAbstractItemView.State.NoState)
+        self.viewport().update()
+
+class _ThumbnailSignals(QObject):
+    result_ready = pyqtSignal(object, int, object)  # (layer, dirty_version, HxWx4 uint8 array)
+
+def _downscale_rgba(pixels, size):
+    """Fit an (H, W, 4) uint8 RGBA array into size x size, keeping aspect ratio.
+
+    Like PIL's thumbnail(): the long side becomes exactly `size` (smaller
+    images are left as is). Strided pre-decimation to at most 4x the target,
+    then an alpha-weighted box filter over uneven bins so the output lands on
+    the exact target size and transparent pixels don't darken the edges.
+    """
+    h, w = pixels.shape[:2]
+    if max(h, w) <= size:
+        return np.ascontiguousarray(pixels)
+    scale = size / max(h, w)
+    th, tw = max(1, round(h * scale)), max(1, round(w * scale))
+    step = max(1, max(h, w) // (size * 4))
+    pixels = pixels[::step, ::step]
+    h, w = pixels.shape[:2]
+    # Bin i covers source rows [i*h//th, (i+1)*h//th); sizes differ by at most one
+    ys = np.arange(th) * h // th
+    xs = np.arange(tw) * w // tw
+    counts = np.diff(np.append(ys, h))[:, None, None] * np.diff(np.append(xs, w))[None, :, None]
+    px = pixels.astype(np.float32)
+    alpha = px[..., 3:4]
+    premul = np.concatenate([px[..., :3] * alpha, alpha], axis=-1)
+    sums = np.add.reduceat(np.add.reduceat(premul, ys, axis=0), xs, axis=1)
+    a_sum = sums[..., 3:4]
+    out = np.empty((th, tw, 4), dtype=np.uint8)
+    out[..., :3] = np.clip(sums[..., :3] / np.maximum(a_sum, 1e-6) + 0.5, 0, 255)
+    out[..., 3:] = np.clip(a_sum / counts + 0.5, 0, 255)
+    return out
+
+class _ThumbnailJob(QRunnable):
+    """Downscales read-back layer pixels off the UI thread."""
+
+    def __init__(self, signals, layer, version, pixels, size):
+        super().__init__()
+        self.signals = signals
+        self.layer = layer
+        self.version = version
+        self.pixels = pixels
+        self.size = size
+
+    def run(self):
+        try:
+            self.signals.result_ready.emit(self.layer, self.version, _downscale_rgba(self.pixels, self.size))
+        except Exception as e:
+            print(f"Thumbnail error: {e}")
+
 class LayerPanel(QWidget):
+    THUMBNAIL_CHUNK = 4  # thumbnails generated per event-loop turn
+    THUMBNAIL_SIZE = 32
+
     def __init__(self, canvas):
         super().__init__()
         self.canvas = canvas
+        self.canvas.layer_structure_changing.connect(self._on_structure_changing)
         self.canvas.layer_structure_changed.connect(self.refresh)
+        self._pending_thumbs = {}  # id(layer) -> PaintLayer, in request order
+        self._thumb_flush_armed = False
+        self._thumb_signals = _ThumbnailSignals(self)
+        self._thumb_signals.result_ready.connect(self._on_thumbnail_ready)
+        # Scratch image every thumbnail is composed into before becoming a pixmap
+        self._thumb_buf = QImage(self.THUMBNAIL_SIZE, self.THUMBNAIL_SIZE, QImage.Format.Format_RGBA8888)
+        self._collapsed_groups = weakref.WeakSet()  # groups the user collapsed
         self._node_clipboard = None
         self._node_clipboard_was_cut = False
         self._opacity_before_state = None
@@ -602,32 +970,31 @@ class LayerPanel(QWidget):
         layout.addLayout(op_layout)
 
         # --- Layer Tree ---
-        self.tree = QTreeWidget()
+        self.model = LayerModel(canvas, self)
+        self.model.thumbnailNeeded.connect(self._queue_thumbnail)
+        self.model.visibilityToggled.connect(self._on_visibility_toggled)
+        self.tree = LayersTreeView()
+        self.tree.setModel(self.model)
         self.tree.setHeaderHidden(True)
         self.tree.setIndentation(15)
         self.tree.setDragEnabled(True)
         self.tree.setAcceptDrops(True)
-        self.tree.setDragDropMode(QTreeWidget.DragDropMode.InternalMove)
+        self.tree.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
         self.tree.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
-        self.tree.setIconSize(QSize(32, 32)) # Set icon size for thumbnails
+        self.tree.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.tree.setIconSize(QSize(self.THUMBNAIL_SIZE, self.THUMBNAIL_SIZE)) # Set icon size for thumbnails
+        self.tree.setUniformRowHeights(True)
+        self.tree.collapsed.connect(self._on_item_collapsed)
+        self.tree.expanded.connect(self._on_item_expanded)
         
         # Context Menu
         self.tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.tree.customContextMenuRequested.connect(self._show_context_menu)
         
-        # --- CRITICAL FIX: Override dropEvent to sync logic ---
-        original_drop_event = self.tree.dropEvent
-        
-        def new_drop_event(event):
-            before_state = self._gl().begin_history_action()
-            # 1. Perform UI Drop
-            original_drop_event(event)
-            # 2. Sync Logic
-            self._sync_logical_structure()
-            self._gl().end_history_action(before_state, "Reorder Layers")
-             
-        self.tree.dropEvent = new_drop_event
-        # -----------------------------------------------------
+        # Drops move nodes in the layer tree directly (see LayerModel.move_node)
+        self.tree.aboutToDrop.connect(self._on_drop_started)
+        self.tree.dropped.connect(self._on_dropped)
+        self._drop_before_state = None
         original_tree_keypress = self.tree.keyPressEvent
 
         def new_tree_keypress(event):
@@ -637,9 +1004,8 @@ class LayerPanel(QWidget):
 
         self.tree.keyPressEvent = new_tree_keypress
 
-        self.tree.itemDoubleClicked.connect(self._rename_item)
-        self.tree.currentItemChanged.connect(self._on_select)
-        self.tree.itemChanged.connect(self._on_data_change)
+        self.tree.doubleClicked.connect(self._rename_item)
+        self.tree.selectionModel().currentChanged.connect(self._on_select)
         
         layout.addWidget(self.tree)
         
@@ -661,6 +1027,10 @@ class LayerPanel(QWidget):
     def _gl(self):
         return self.canvas.gl_canvas if hasattr(self.canvas, 'gl_canvas') else self.canvas
 
+    def _current_node(self):
+        index = self.tree.currentIndex()
+        return self.model.node_from_index(index) if index.isValid() else None
+
     def _handle_tree_shortcut(self, event):
         if event.key() in (Qt.Key.Key_Delete, Qt.Key.Key_Backspace):
             self._del_node()
@@ -745,10 +1115,7 @@ class LayerPanel(QWidget):
         return node
 
     def copy_selected_node(self):
-        curr = self.tree.currentItem()
-        if not curr:
-            return False
-        node = curr.data(0, Qt.ItemDataRole.UserRole)
+        node = self._current_node()
         if not node or node == self.canvas.root:
             return False
         gl = self._gl()
@@ -758,10 +1125,7 @@ class LayerPanel(QWidget):
         return True
 
     def cut_selected_node(self):
-        curr = self.tree.currentItem()
-        if not curr:
-            return False
-        node = curr.data(0, Qt.ItemDataRole.UserRole)
+        node = self._current_node()
         if not node or node == self.canvas.root or node.parent is None:
             return False
         if not self.copy_selected_node():
@@ -770,7 +1134,7 @@ class LayerPanel(QWidget):
         before_state = self._gl().begin_history_action()
         node.parent.remove_child(node)
         self.canvas.active_layer = None
-        self.canvas.layer_structure_changed.emit()
+        self.canvas.schedule_layer_refresh()
         self.canvas.update()
         self._gl().end_history_action(before_state, "Cut Layer Node")
         return True
@@ -783,8 +1147,7 @@ class LayerPanel(QWidget):
         gl.makeCurrent()
         before_state = gl.begin_history_action()
 
-        curr = self.tree.currentItem()
-        target = curr.data(0, Qt.ItemDataRole.UserRole) if curr else self.canvas.root
+        target = self._current_node() or self.canvas.root
 
         if isinstance(target, GroupLayer):
             parent = target
@@ -801,7 +1164,7 @@ class LayerPanel(QWidget):
         pasted.parent = parent
 
         self.canvas.active_layer = pasted
-        self.canvas.layer_structure_changed.emit()
+        self.canvas.schedule_layer_refresh()
         self.canvas.update()
         gl.end_history_action(before_state, "Paste Layer Node")
 
@@ -810,11 +1173,36 @@ class LayerPanel(QWidget):
             self._node_clipboard_was_cut = False
         return True
 
-    def _update_item_thumbnail(self, item):
-        """Helper to update a single item's thumbnail."""
-        node = item.data(0, Qt.ItemDataRole.UserRole)
-        if not isinstance(node, PaintLayer):
+    def _queue_thumbnail(self, node):
+        """Schedule a thumbnail for a layer the view is about to show."""
+        if id(node) in self._pending_thumbs:
+            return
+        self._pending_thumbs[id(node)] = node
+        if not self._thumb_flush_armed:
+            self._thumb_flush_armed = True
+            QTimer.singleShot(0, self._fill_thumbnails_chunked)
+
+    def _fill_thumbnails_chunked(self):
+        self._thumb_flush_armed = False
+        for node_id in list(self._pending_thumbs)[:self.THUMBNAIL_CHUNK]:
+            self._update_thumbnail(self._pending_thumbs.pop(node_id))
+        if self._pending_thumbs:
+            self._thumb_flush_armed = True
+            QTimer.singleShot(0, self._fill_thumbnails_chunked)
+
+    def _update_thumbnail(self, node):
+        """Regenerate a layer's cached thumbnail if its pixels changed.
+
+        Only the GL readback runs here; downscaling happens on the thread pool.
+        """
+        key = getattr(node, "_thumb_key", None)
+        if (key is not None and getattr(node, "_thumb_version", None) == node.dirty_version
+                and QPixmapCache.find(key) is not None):
             return
+        if getattr(node, "_thumb_job_version", None) == node.dirty_version:
+            return  # already being generated
+        if not self.model.index_for_node(node).isValid():
+            return  # no longer in the tree
 
         # Context safety
         if hasattr(self.canvas, 'make_current'):
@@ -823,70 +1211,82 @@ class LayerPanel(QWidget):
             self.canvas.gl_canvas.makeCurrent()
 
         try:
-            # Get PIL Image from layer (This calls glReadPixels)
-            pil_img = node.get_image()
-            
-            # Generate thumbnail efficiently
-            pil_img.thumbnail((32, 32))
-            if pil_img.mode != "RGBA":
-                pil_img = pil_img.convert("RGBA")
-            
-            # Direct buffer access
-            data = pil_img.tobytes("raw", "RGBA")
-            qimg = QImage(data, pil_img.width, pil_img.height, QImage.Format.Format_RGBA8888).copy()
-            
-            pixmap = QPixmap.fromImage(qimg)
-            item.setIcon(0, QIcon(pixmap))
+            # Raw RGBA view of the glReadPixels buffer, no PIL/bytes copies
+            pixels = node.get_image_np()
         except Exception as e:
             print(f"Thumbnail error: {e}")
+            return
 
-    def refresh(self):
-        """Refreshes the layer tree, including generating thumbnails."""
+        node._thumb_job_version = node.dirty_version
+        QThreadPool.globalInstance().start(
+            _ThumbnailJob(self._thumb_signals, node, node.dirty_version, pixels, self.THUMBNAIL_SIZE))
+
+    def _on_thumbnail_ready(self, node, version, rgba):
+        if getattr(node, "_thumb_job_version", None) == version:
+            node._thumb_job_version = None
+        if version != node.dirty_version or not self.model.index_for_node(node).isValid():
+            return  # pixels changed meanwhile or layer removed; a newer request takes over
+        key = getattr(node, "_thumb_key", None)
+        if key is not None:
+            QPixmapCache.remove(key)
+        node._thumb_key = QPixmapCache.insert(self._thumbnail_pixmap(rgba))
+        node._thumb_version = version
+        self.model.node_changed(node, [Qt.ItemDataRole.DecorationRole])
+
+    def _thumbnail_pixmap(self, rgba):
+        """Pixmap of an HxWx4 uint8 thumbnail, centered in the reusable buffer."""
+        size = self.THUMBNAIL_SIZE
+        bits = self._thumb_buf.bits()
+        bits.setsize(self._thumb_buf.sizeInBytes())
+        buf = np.frombuffer(bits, dtype=np.uint8).reshape(size, self._thumb_buf.bytesPerLine() // 4, 4)
+        h, w = rgba.shape[:2]
+        oy, ox = (size - h) // 2, (size - w) // 2
+        buf[:] = 0
+        buf[oy:oy + h, ox:ox + w] = rgba
+        return QPixmap.fromImage(self._thumb_buf)
+
+    def _on_item_collapsed(self, index):
+        node = self.model.node_from_index(index)
+        if isinstance(node, GroupLayer):
+            self._collapsed_groups.add(node)
+
+    def _on_item_expanded(self, index):
+        self._collapsed_groups.discard(self.model.node_from_index(index))
+
+    def _apply_expansion(self):
+        # Groups default to expanded; restore only the ones the user collapsed
         self.tree.blockSignals(True)
-        self.tree.clear()
-        
-        # Ensure context is current for reading pixels for thumbnails
-        if hasattr(self.canvas, 'make_current'):
-            self.canvas.make_current()
-        elif hasattr(self.canvas, 'gl_canvas'):
-            self.canvas.gl_canvas.makeCurrent()
-        
-        def build_tree(ui_parent, node_parent):
-            # Reverse for UI (Top layer in logic should be top in UI)
-            for node in reversed(node_parent.children):
-                item = QTreeWidgetItem(ui_parent)
-                item.setText(0, node.name)
-                item.setData(0, Qt.ItemDataRole.UserRole, node)
-                item.setCheckState(0, Qt.CheckState.Checked if node.visible else Qt.CheckState.Unchecked)
-                
-                # --- Thumbnail Generation ---
-                if isinstance(node, PaintLayer):
-                    self._update_item_thumbnail(item)
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsDropEnabled)
-                elif isinstance(node, GroupLayer):
-                    # Folder Icon
-                    item.setText(0, f"> {node.name}")
-                    item.setExpanded(True)
-                    item.setBackground(0, QColor("#eaeaea"))
-                    build_tree(item, node)
-                # -----------------------------
-                
-                if node == self.canvas.active_layer:
-                    self.tree.setCurrentItem(item)
-                    # Sync Opacity Slider
-                    self.opacity_slider.blockSignals(True)
-                    self.opacity_slider.setValue(int(node.opacity * 100))
-                    self.lbl_opacity_val.setText(f"{int(node.opacity * 100)}%")
-                    self.opacity_slider.blockSignals(False)
-
-        build_tree(self.tree, self.canvas.root)
+        self.tree.expandAll()
+        for group in list(self._collapsed_groups):
+            index = self.model.index_for_node(group)
+            if index.isValid():
+                self.tree.collapse(index)
         self.tree.blockSignals(False)
 
+    def _on_structure_changing(self):
+        # The tree was edited directly; invalidate the view's indexes now and
+        # keep it from painting until refresh() finishes the reset
+        self.tree.setUpdatesEnabled(False)
+        self.model.begin_reset()
+        self.tree.selectionModel().clear()  # current/selected rows may name removed nodes
+
+    def refresh(self):
+        """Resets the layer model; thumbnails are generated lazily for visible rows."""
+        self.tree.setUpdatesEnabled(False)
+        self._pending_thumbs.clear()
+        self.model.end_reset()
+        self._apply_expansion()
+
+        active_index = self.model.index_for_node(self.canvas.active_layer)
+        if active_index.isValid():
+            self.tree.setCurrentIndex(active_index)
+        self.tree.setUpdatesEnabled(True)
+
     def _show_context_menu(self, position):
-        item = self.tree.itemAt(position)
-        if not item: return
+        index = self.tree.indexAt(position)
+        if not index.isValid(): return
         
-        node = item.data(0, Qt.ItemDataRole.UserRole)
+        node = self.model.node_from_index(index)
         menu = QMenu()
         
         # Add actions based on layer type
@@ -938,7 +1338,7 @@ class LayerPanel(QWidget):
         new_img = remove_white_background(layer.get_image())
         layer.load_from_image(new_img)
         self.canvas.update()
-        self.refresh()  # update thumbnail
+        self.model.node_changed(layer, [Qt.ItemDataRole.DecorationRole])  # update thumbnail
         gl.end_history_action(before_state, "Remove White Background")
 
     def _chroma_key(self, layer):
@@ -957,7 +1357,7 @@ class LayerPanel(QWidget):
                 gl.makeCurrent()
                 layer.load_from_image(result)
                 self.canvas.update()
-                self.refresh()
+                self.model.node_changed(layer, [Qt.ItemDataRole.DecorationRole])
                 gl.end_history_action(before_state, "Chroma Key")
 
     def _on_opacity_begin(self):
@@ -975,45 +1375,20 @@ class LayerPanel(QWidget):
         self._gl().end_history_action(self._opacity_before_state, "Change Opacity")
         self._opacity_before_state = None
 
-    def _sync_logical_structure(self):
-        """Rebuilds the Canvas logical tree based on the current UI TreeWidget structure."""
-        def rebuild_node(tree_item):
-            logical_node = tree_item.data(0, Qt.ItemDataRole.UserRole)
-            logical_node.children = [] # Reset logic children
-            
-            count = tree_item.childCount()
-            # Iterate Reverse (UI Top -> Logic Last)
-            for i in range(count - 1, -1, -1):
-                child_item = tree_item.child(i)
-                child_node = rebuild_node(child_item)
-                logical_node.add_child(child_node)
-            return logical_node
-
-        self.canvas.root.children = []
-        count = self.tree.topLevelItemCount()
-        for i in range(count - 1, -1, -1):
-            item = self.tree.topLevelItem(i)
-            node = rebuild_node(item)
-            self.canvas.root.add_child(node)
-            
+    def _on_drop_started(self):
+        self._drop_before_state = self._gl().begin_history_action()
+
+    def _on_dropped(self):
         self.canvas.update()
+        self._gl().end_history_action(self._drop_before_state, "Reorder Layers")
+        self._drop_before_state = None
 
     def _on_select(self, current, prev):
-        if not current: return
-        node = current.data(0, Qt.ItemDataRole.UserRole)
+        if not current.isValid(): return
+        node = self.model.node_from_index(current)
         self.canvas.active_layer = node
-        
-        # --- Update Thumbnails on Selection Change ---
-        # Update previous (it might have changed since we left it)
-        if prev:
-            prev_node = prev.data(0, Qt.ItemDataRole.UserRole)
-            if isinstance(prev_node, PaintLayer):
-                self._update_item_thumbnail(prev)
-        
-        # Update current (ensure it's fresh)
-        if isinstance(node, PaintLayer):
-            self._update_item_thumbnail(current)
-        # ---------------------------------------------
+        # Thumbnails of the rows repainted by the selection change refresh themselves
+        # through LayerModel.data() when their layer's pixels changed.
         
         # Sync Opacity Slider
         self.opacity_slider.blockSignals(True)
@@ -1021,46 +1396,37 @@ class LayerPanel(QWidget):
         self.lbl_opacity_val.setText(f"{int(node.opacity * 100)}%")
         self.opacity_slider.blockSignals(False)
 
-    def _on_data_change(self, item, col):
-        node = item.data(0, Qt.ItemDataRole.UserRole)
-        if node:
-            before_state = self._gl().begin_history_action()
-            is_checked = (item.checkState(0) == Qt.CheckState.Checked)
-            node.visible = is_checked
-            if isinstance(node, GroupLayer):
-                self.tree.blockSignals(True)
-                self._set_node_visibility_recursive(item, is_checked)
-                self.tree.blockSignals(False)
-            self.canvas.update()
-            self._gl().end_history_action(before_state, "Toggle Visibility")
+    def _on_visibility_toggled(self, node, is_checked):
+        before_state = self._gl().begin_history_action()
+        node.visible = is_checked
+        self.model.node_changed(node, [Qt.ItemDataRole.CheckStateRole])
+        if isinstance(node, GroupLayer):
+            self._set_node_visibility_recursive(node, is_checked)
+            self.model.subtree_changed(node, [Qt.ItemDataRole.CheckStateRole])
+        self.canvas.update()
+        self._gl().end_history_action(before_state, "Toggle Visibility")
 
-    def _set_node_visibility_recursive(self, parent_item, visible):
-        for i in range(parent_item.childCount()):
-            child_item = parent_item.child(i)
-            child_node = child_item.data(0, Qt.ItemDataRole.UserRole)
-            
-            child_item.setCheckState(0, Qt.CheckState.Checked if visible else Qt.CheckState.Unchecked)
-            if child_node:
+    def _set_node_visibility_recursive(self, group, visible):
+        # Explicit stack instead of one Python frame per nested group
+        stack = [group]
+        while stack:
+            for child_node in stack.pop().children:
                 child_node.visible = visible
-                
-            if isinstance(child_node, GroupLayer):
-                self._set_node_visibility_recursive(child_item, visible)
+                if isinstance(child_node, GroupLayer):
+                    stack.append(child_node)
 
-    def _rename_item(self, item, col):
-        node = item.data(0, Qt.ItemDataRole.UserRole)
+    def _rename_item(self, index):
+        node = self.model.node_from_index(index)
         text, ok = QInputDialog.getText(self, "Rename", "Name:", text=node.name)
         if ok and text:
             before_state = self._gl().begin_history_action()
             node.name = text
-            item.setText(0, text)
-            if isinstance(node, GroupLayer):
-                item.setText(0, f"> {text}")
+            self.model.node_changed(node, [Qt.ItemDataRole.DisplayRole])
             self._gl().end_history_action(before_state, "Rename Layer")
 
     def _add_layer(self):
         before_state = self._gl().begin_history_action()
-        curr = self.tree.currentItem()
-        target = curr.data(0, Qt.ItemDataRole.UserRole) if curr else self.canvas.root
+        target = self._current_node() or self.canvas.root
         
         if isinstance(target, PaintLayer):
             parent = target.parent if target.parent else self.canvas.root
@@ -1068,42 +1434,40 @@ class LayerPanel(QWidget):
             parent = target
             
         new_l = PaintLayer(self.canvas.doc_width, self.canvas.doc_height, "New Layer")
-        parent.add_child(new_l)
+        self.model.add_node(parent, new_l)
         self.canvas.active_layer = new_l
-        self.canvas.layer_structure_changed.emit()
+        self.tree.setCurrentIndex(self.model.index_for_node(new_l))
         self.canvas.update()
         self._gl().end_history_action(before_state, "Add Layer")
 
     def _add_group(self):
         before_state = self._gl().begin_history_action()
         grp = GroupLayer("New Group")
-        self.canvas.root.add_child(grp)
-        self.canvas.layer_structure_changed.emit()
+        self.model.add_node(self.canvas.root, grp)
         self.canvas.active_layer = grp
+        self.tree.setCurrentIndex(self.model.index_for_node(grp))
         self.canvas.update()
         self._gl().end_history_action(before_state, "Add Group")
 
     def _del_node(self):
-        curr = self.tree.currentItem()
-        if not curr: return
-        node = curr.data(0, Qt.ItemDataRole.UserRole)
+        node = self._current_node()
         if node and node.parent:
             before_state = self._gl().begin_history_action()
-            node.parent.remove_child(node)
+            self.model.remove_node(node)
+            # Removing the current row moves the view's current index to a neighbour;
+            # clear it so the tree and the canvas agree that nothing is active.
+            self.tree.setCurrentIndex(QModelIndex())
             self.canvas.active_layer = None
-            self.canvas.layer_structure_changed.emit()
             self.canvas.update()
             self._gl().end_history_action(before_state, "Delete Node")
 
     def _merge_layers(self):
         """Button handler: smart merge based on what's selected."""
-        curr = self.tree.currentItem()
-        if not curr:
+        node = self._current_node()
+        if node is None:
             QMessageBox.warning(self, "Merge", "Please select a layer or group.")
             return
 
-        node = curr.data(0, Qt.ItemDataRole.UserRole)
-
         if isinstance(node, GroupLayer) and node != self.canvas.root:
             self._flatten_group(node)
         elif isinstance(node, PaintLayer):
@@ -1149,7 +1513,7 @@ class LayerPanel(QWidget):
         merged.parent = parent
 
         self.canvas.active_layer = merged
-        self.canvas.layer_structure_changed.emit()
+        self.canvas.schedule_layer_refresh()
         self.canvas.update()
         gl.end_history_action(before_state, "Merge Down")
 
@@ -1177,7 +1541,7 @@ class LayerPanel(QWidget):
             parent.add_child(merged)
 
         self.canvas.active_layer = merged
-        self.canvas.layer_structure_changed.emit()
+        self.canvas.schedule_layer_refresh()
         self.canvas.update()
         gl.end_history_action(before_state, "Flatten Group")
 
@@ -1226,7 +1590,7 @@ class LayerPanel(QWidget):
         # Add merged layer to root
         self.canvas.root.add_child(merged)
         self.canvas.active_layer = merged
-        self.canvas.layer_structure_changed.emit()
+        self.canvas.schedule_layer_refresh()
         self.canvas.update()
         gl.end_history_action(before_state, "Merge Visible")
 
@@ -1234,6 +1598,8 @@ class PropertyPanel(QWidget):
     def __init__(self, canvas):
         super().__init__()
         self.canvas = canvas
+        self._brush = self.canvas.current_brush
+        self.canvas.brush_changed.connect(self._on_brush_changed)
         outer_layout = QVBoxLayout(self)
         outer_layout.setContentsMargins(0, 0, 0, 0)
 
@@ -1254,8 +1620,11 @@ class PropertyPanel(QWidget):
         l_color = QVBoxLayout(group_color)
         self.color_picker = ColorPickerWidget()
         
-        self.color_picker.colorChanged.connect(lambda rgb: setattr(self.canvas, 'brush_color', rgb))
-        self.canvas.brush_color_changed.connect(self.color_picker.set_color)
+        self._pushing_color = False
+        self._brush_color_setter = _CoalescedSetter(self._push_brush_color)
+        self.color_picker.colorChanged.connect(self._brush_color_setter)
+        self.canvas.brush_color_changed.connect(self._brush_color_setter.sync)
+        self.canvas.brush_color_changed.connect(self._on_canvas_brush_color)
         
         l_color.addWidget(self.color_picker)
         layout.addWidget(group_color)
@@ -1268,9 +1637,9 @@ class PropertyPanel(QWidget):
             s.valueChanged.connect(func); h.addWidget(s)
             return h
         
-        l_brush.addLayout(mk_sl("Size", 1, 300, 10, lambda v: setattr(self.canvas.current_brush, 'size', v) if self.canvas.current_brush else None))
-        l_brush.addLayout(mk_sl("Opacity", 0, 100, 100, lambda v: setattr(self.canvas.current_brush, 'opacity', v/100) if self.canvas.current_brush else None))
-        l_brush.addLayout(mk_sl("Flow", 0, 100, 100, lambda v: setattr(self.canvas.current_brush, 'flow', v/100) if self.canvas.current_brush else None))
+        l_brush.addLayout(mk_sl("Size", 1, 300, 10, self._set_brush_size))
+        l_brush.addLayout(mk_sl("Opacity", 0, 100, 100, self._set_brush_opacity))
+        l_brush.addLayout(mk_sl("Flow", 0, 100, 100, self._set_brush_flow))
         smoothing_init = int(getattr(getattr(self.canvas, "stabilizer", None), "smoothing_factor", 0.0) * 100)
         l_brush.addLayout(mk_sl("Stabilize", 0, 95, smoothing_init, self._on_smoothing_change))
 
@@ -1309,6 +1678,40 @@ class PropertyPanel(QWidget):
         if hasattr(self.canvas, 'gl_canvas'):
             self.canvas.gl_canvas.open_gradient_map()
 
+    def _push_brush_color(self, rgb):
+        self._pushing_color = True
+        try:
+            self.canvas.brush_color = rgb
+        finally:
+            self._pushing_color = False
+
+    def _on_canvas_brush_color(self, rgb):
+        # The picker already shows the color it just pushed; echoing it back
+        # would repaint the whole wheel and nudge its hue on every drag step
+        if not self._pushing_color:
+            self.color_picker.set_color(rgb)
+
+    def _on_brush_changed(self, brush):
+        self._brush = brush
+
+    def _set_brush_size(self, v):
+        brush = self._brush
+        if brush is None:
+            return
+        brush.size = v
+
+    def _set_brush_opacity(self, v):
+        brush = self._brush
+        if brush is None:
+            return
+        brush.opacity = v / 100
+
+    def _set_brush_flow(self, v):
+        brush = self._brush
+        if brush is None:
+            return
+        brush.flow = v / 100
+
     def _toggle_pressure_curve(self, curve_type):
         if curve_type == 'size':
             editor = self.pressure_size_editor
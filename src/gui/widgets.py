@@ -17,12 +17,89 @@ from PyQt6.QtWidgets import (
     QTextEdit,
     QPlainTextEdit,
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QPoint, QPointF, QRectF
-from PyQt6.QtGui import (QPainter, QColor, QConicalGradient, QBrush, QPainterPath, QLinearGradient, QPen, QPixmap, QImage, QMouseEvent)
+from PyQt6.QtCore import Qt, pyqtSignal, QPoint, QPointF, QRectF, QTimer
+from PyQt6.QtGui import (QPainter, QColor, QBrush, QPainterPath, QPen, QPixmap, QImage, QMouseEvent,
+                         QTransform, QPixmapCache)
 import math
+import numpy as np
+
+class _CoalescedSetter:
+    """Forwards the latest color to `setter` at most once per event-loop turn.
+
+    Color picker drags emit colorChanged on every mouse move; consumers such
+    as the canvas brush color only need the last value of a burst.
+    """
+
+    def __init__(self, setter):
+        self._setter = setter
+        self._pending_rgb = None
+        self._last_rgb = None
+        self._armed = False
+
+    def __call__(self, rgb):
+        self._pending_rgb = list(rgb)
+        if not self._armed:
+            self._armed = True
+            QTimer.singleShot(0, self._flush)
+
+    def sync(self, rgb):
+        """Record the target's current value after an external change."""
+        self._last_rgb = list(rgb) if rgb is not None else None
+
+    def _flush(self):
+        self._armed = False
+        rgb = self._pending_rgb
+        self._pending_rgb = None
+        if rgb is None or rgb == self._last_rgb:
+            return
+        self._last_rgb = rgb
+        self._setter(rgb)
+
+class _MoveThrottle:
+    """Applies drag positions to `handler` at most once per `interval_ms`.
+
+    The first move of a burst is applied immediately; moves inside the window
+    only replace the pending position, which is applied when it closes.
+    """
+
+    def __init__(self, parent, handler, interval_ms=16):
+        self._handler = handler
+        self._pending_pos = None
+        self._timer = QTimer(parent)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._on_timeout)
+
+    def __call__(self, pos):
+        if self._timer.isActive():
+            self._pending_pos = QPointF(pos)
+            return
+        self._handler(pos)
+        self._timer.start()
+
+    def flush(self):
+        """Apply the pending position now, e.g. on mouse release."""
+        self._timer.stop()
+        pos, self._pending_pos = self._pending_pos, None
+        if pos is not None:
+            self._handler(pos)
+
+    def _on_timeout(self):
+        pos, self._pending_pos = self._pending_pos, None
+        if pos is not None:
+            self._handler(pos)
+            self._timer.start()
 
 class ProcreateColorPicker(QWidget):
     colorChanged = pyqtSignal(list) # [r, g, b]
+    _hue_lut = None  # shared by all pickers, built on first use
+
+    # Shared paint resources for the box border and indicators
+    _PEN_BORDER = QPen(QColor(100, 100, 100), 1)
+    _PEN_BLACK_2 = QPen(Qt.GlobalColor.black, 2)
+    _PEN_WHITE_2 = QPen(Qt.GlobalColor.white, 2)
+    _PEN_BLACK_1 = QPen(Qt.GlobalColor.black, 1)
+    _BRUSH_WHITE = QBrush(Qt.GlobalColor.white)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -42,9 +119,57 @@ class ProcreateColorPicker(QWidget):
         self.dragging_ring = False
         self.dragging_box = False
 
+        # Cached renders: the ring only depends on geometry, the SV base on hue too
+        self._ring_pm = None
+        self._ring_key = None
+        self._sv_pm = None
+        self._sv_key = None
+
+        # colorChanged is emitted at most once per event-loop turn while dragging
+        self._pending_rgb = None
+        self._emit_timer = QTimer(self)
+        self._emit_timer.setSingleShot(True)
+        self._emit_timer.setInterval(0)
+        self._emit_timer.timeout.connect(self._flush_color)
+        # Drag moves are applied at ~60 Hz however fast the mouse reports
+        self._drag_throttle = _MoveThrottle(self, self._apply_drag_pos)
+
+        self._update_geometry()
+        if ProcreateColorPicker._hue_lut is None:
+            ProcreateColorPicker._hue_lut = self._build_hue_lut()
+
+    @staticmethod
+    def _build_hue_lut():
+        """256x256 table: hue for the direction (x-128, y-128), hue 0 at the top."""
+        ys, xs = np.mgrid[0:256, 0:256].astype(np.float32) - 128.0
+        angle_from_top = (np.degrees(np.arctan2(ys, xs)) + 90.0) % 360.0
+        return np.clip(1.0 - angle_from_top / 360.0, 0.0, 1.0).astype(np.float32)
+
+    def _update_geometry(self):
+        """Cache center/radii/SV box so paints and hit-tests do no sqrt."""
+        w, h = self.width(), self.height()
+        self._center = QPointF(w/2, h/2)
+        self._outer_radius = min(w, h)/2 - self.margin
+        self._inner_radius = self._outer_radius - self.ring_width
+        self._outer_r2 = self._outer_radius * self._outer_radius
+        self._inner_r2 = self._inner_radius * self._inner_radius
+        box_half_size = (self._inner_radius - 10) / math.sqrt(2) * 0.9
+        self.box_rect = QRectF(self._center.x() - box_half_size, self._center.y() - box_half_size,
+                               box_half_size*2, box_half_size*2)
+
+    def resizeEvent(self, event):
+        self._update_geometry()
+        # Cached renders are sized to the old geometry; drop them now rather
+        # than holding them until the next paint notices the key mismatch
+        self._ring_pm = self._ring_key = None
+        self._sv_pm = self._sv_key = None
+        super().resizeEvent(event)
+
     def set_color_rgb(self, r, g, b):
         """外部设置颜色"""
         c = QColor.fromRgbF(r, g, b)
+        if c.rgb() == self.current_color.rgb():
+            return  # same color; keep the exact hue/sat/val the user dragged to
         self.hue = max(0.0, min(1.0, c.hsvHueF()))
         if self.hue < 0: self.hue = 0.0
         self.sat = c.hsvSaturationF()
@@ -54,65 +179,80 @@ class ProcreateColorPicker(QWidget):
 
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         w, h = self.width(), self.height()
-        center = QPointF(w/2, h/2)
-        outer_radius = min(w, h)/2 - self.margin
-        inner_radius = outer_radius - self.ring_width
+        center = self._center
+        outer_radius = self._outer_radius
+        inner_radius = self._inner_radius
         
-        # 1. Draw Hue Ring
-        self._draw_hue_ring(painter, center, inner_radius, outer_radius)
+        # 1. Draw Hue Ring (re-rendered only when the geometry changes)
+        ring_key = (w, h, self.devicePixelRatioF())
+        if self._ring_key != ring_key:
+            self._ring_pm = QPixmap.fromImage(self._hue_ring_image(center, inner_radius, outer_radius))
+            self._ring_key = ring_key
+        painter.drawPixmap(0, 0, self._ring_pm)
         
         # 2. Draw SV Box
-        box_half_size = (inner_radius - 10) / math.sqrt(2) * 0.9 
-        box_rect = QRectF(center.x() - box_half_size, center.y() - box_half_size,
-                          box_half_size*2, box_half_size*2)
+        box_rect = self.box_rect
         self._draw_sv_box(painter, box_rect)
         
-        # 3. Draw Indicators
+        # 3. Draw Indicators (the only curves; the blits and box border are axis-aligned)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         self._draw_hue_indicator(painter, center, inner_radius, outer_radius)
         self._draw_sv_indicator(painter, box_rect)
 
-    def _draw_hue_ring(self, painter, center, r_in, r_out):
-        gradient = QConicalGradient(center, 90)
-        for i in range(0, 361, 10):
-            hue_val = i % 360
-            gradient.setColorAt(i/360.0, QColor.fromHsv(hue_val, 255, 255))
-            
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.setBrush(QBrush(gradient))
-        
-        path = QPainterPath()
-        path.addEllipse(center, r_out, r_out)
-        path_inner = QPainterPath()
-        path_inner.addEllipse(center, r_in, r_in)
-        path = path.subtracted(path_inner)
-        
-        painter.drawPath(path)
+    def _hue_ring_image(self, center, r_in, r_out):
+        """Widget-sized premultiplied RGBA image of the hue annulus, rasterized in numpy.
+
+        Matches _update_hue_from_pos: hue 0 at the top, increasing
+        counter-clockwise. Alpha is the pixel's coverage of the ring, so the
+        edges come out antialiased without any path or gradient work.
+        """
+        dpr = self.devicePixelRatioF()
+        w, h = math.ceil(self.width() * dpr), math.ceil(self.height() * dpr)
+        ys, xs = np.mgrid[0:h, 0:w].astype(np.float32)
+        dx = (xs + 0.5) / dpr - center.x()
+        dy = (ys + 0.5) / dpr - center.y()
+        r = np.hypot(dx, dy)
+        alpha = np.clip(np.minimum(r - r_in, r_out - r) * dpr + 0.5, 0.0, 1.0)
+        hue6 = ((-np.degrees(np.arctan2(dy, dx)) - 90.0) % 360.0) / 60.0
+        rgba = np.empty((h, w, 4), dtype=np.uint8)
+        rgba[..., 0] = np.clip(np.abs(hue6 - 3.0) - 1.0, 0.0, 1.0) * alpha * 255 + 0.5
+        rgba[..., 1] = np.clip(2.0 - np.abs(hue6 - 2.0), 0.0, 1.0) * alpha * 255 + 0.5
+        rgba[..., 2] = np.clip(2.0 - np.abs(hue6 - 4.0), 0.0, 1.0) * alpha * 255 + 0.5
+        rgba[..., 3] = alpha * 255 + 0.5
+        img = QImage(rgba.tobytes(), w, h, w * 4, QImage.Format.Format_RGBA8888_Premultiplied).copy()
+        img.setDevicePixelRatio(dpr)
+        return img
 
     def _draw_sv_box(self, painter, rect):
-        hue_color = QColor.fromHsvF(self.hue, 1.0, 1.0)
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.setBrush(hue_color)
-        painter.drawRect(rect)
-        
-        g_sat = QLinearGradient(rect.left(), rect.top(), rect.right(), rect.top())
-        g_sat.setColorAt(0, QColor(255, 255, 255, 255))
-        g_sat.setColorAt(1, QColor(255, 255, 255, 0))
-        painter.setBrush(g_sat)
-        painter.drawRect(rect)
-        
-        g_val = QLinearGradient(rect.left(), rect.top(), rect.left(), rect.bottom())
-        g_val.setColorAt(0, QColor(0, 0, 0, 0))
-        g_val.setColorAt(1, QColor(0, 0, 0, 255))
-        painter.setBrush(g_val)
-        painter.drawRect(rect)
+        # Base field is re-rendered only when the hue or box size changes
+        sv_key = (self.hue, rect.width(), rect.height(), self.devicePixelRatioF())
+        if self._sv_key != sv_key:
+            self._sv_pm = QPixmap.fromImage(self._sv_base_image(rect.width(), rect.height()))
+            self._sv_key = sv_key
+        painter.drawPixmap(rect.topLeft(), self._sv_pm)
         
         painter.setBrush(Qt.BrushStyle.NoBrush)
-        painter.setPen(QPen(QColor(100,100,100), 1))
+        painter.setPen(self._PEN_BORDER)
         painter.drawRect(rect)
-        self.box_rect = rect
+
+    def _sv_base_image(self, w, h):
+        """w x h saturation/value field for the current hue, built in one numpy pass.
+
+        Saturation runs left to right, value top to bottom; the same result as
+        the hue fill with white and black gradient overlays, without three fills.
+        """
+        dpr = self.devicePixelRatioF()
+        pw, ph = math.ceil(w * dpr), math.ceil(h * dpr)
+        hue = QColor.fromHsvF(self.hue, 1.0, 1.0)
+        hue_rgb = np.array([hue.redF(), hue.greenF(), hue.blueF()], dtype=np.float32)
+        sat = ((np.arange(pw, dtype=np.float32) + 0.5) / pw)[None, :, None]
+        val = (1.0 - (np.arange(ph, dtype=np.float32) + 0.5) / ph)[:, None, None]
+        rgb = (val * (1.0 - sat * (1.0 - hue_rgb)) * 255 + 0.5).astype(np.uint8)
+        img = QImage(rgb.tobytes(), pw, ph, pw * 3, QImage.Format.Format_RGB888).copy()
+        img.setDevicePixelRatio(dpr)
+        return img
 
     def _draw_hue_indicator(self, painter, center, r_in, r_out):
         angle = -90 - (self.hue * 360) 
@@ -120,52 +260,67 @@ class ProcreateColorPicker(QWidget):
         mid_r = (r_in + r_out) / 2
         ix = center.x() + mid_r * math.cos(rad)
         iy = center.y() + mid_r * math.sin(rad)
-        painter.setPen(QPen(Qt.GlobalColor.black, 2))
-        painter.setBrush(Qt.GlobalColor.white)
+        painter.setPen(self._PEN_BLACK_2)
+        painter.setBrush(self._BRUSH_WHITE)
         painter.drawEllipse(QPointF(ix, iy), 6, 6)
 
+    def _sv_indicator_pos(self, rect):
+        return QPointF(rect.left() + self.sat * rect.width(),
+                       rect.top() + (1.0 - self.val) * rect.height())
+
+    def _sv_indicator_rect(self, rect):
+        """Widget-space bounds of the SV indicator (7px ring + pen), for partial repaints."""
+        c = self._sv_indicator_pos(rect)
+        return QRectF(c.x() - 9, c.y() - 9, 18, 18).toAlignedRect()
+
     def _draw_sv_indicator(self, painter, rect):
-        ix = rect.left() + self.sat * rect.width()
-        iy = rect.top() + (1.0 - self.val) * rect.height()
-        painter.setPen(QPen(Qt.GlobalColor.white, 2))
+        c = self._sv_indicator_pos(rect)
+        painter.setPen(self._PEN_WHITE_2)
         painter.setBrush(Qt.BrushStyle.NoBrush)
-        painter.drawEllipse(QPointF(ix, iy), 6, 6)
-        painter.setPen(QPen(Qt.GlobalColor.black, 1))
-        painter.drawEllipse(QPointF(ix, iy), 5, 5)
+        painter.drawEllipse(c, 6, 6)
+        painter.setPen(self._PEN_BLACK_1)
+        painter.drawEllipse(c, 5, 5)
 
     def mousePressEvent(self, event):
         pos = event.position()
-        center = QPointF(self.width()/2, self.height()/2)
-        dist = math.sqrt((pos.x()-center.x())**2 + (pos.y()-center.y())**2)
-        outer_radius = min(self.width(), self.height())/2 - self.margin
-        inner_radius = outer_radius - self.ring_width
+        dx = pos.x() - self._center.x()
+        dy = pos.y() - self._center.y()
+        d2 = dx*dx + dy*dy
         
-        if hasattr(self, 'box_rect') and self.box_rect.contains(pos):
+        if self.box_rect.contains(pos):
             self.dragging_box = True
             self._update_sv_from_pos(pos)
-        elif inner_radius <= dist <= outer_radius:
+        elif self._inner_r2 <= d2 <= self._outer_r2:
             self.dragging_ring = True
             self._update_hue_from_pos(pos)
 
     def mouseMoveEvent(self, event):
-        if self.dragging_box:
-            self._update_sv_from_pos(event.position())
-        elif self.dragging_ring:
-            self._update_hue_from_pos(event.position())
+        if self.dragging_box or self.dragging_ring:
+            self._drag_throttle(event.position())
 
     def mouseReleaseEvent(self, event):
+        self._drag_throttle.flush()
         self.dragging_ring = False
         self.dragging_box = False
 
+    def _apply_drag_pos(self, pos):
+        if self.dragging_box:
+            self._update_sv_from_pos(pos)
+        elif self.dragging_ring:
+            self._update_hue_from_pos(pos)
+
     def _update_hue_from_pos(self, pos):
-        center = QPointF(self.width()/2, self.height()/2)
-        dx = pos.x() - center.x()
-        dy = pos.y() - center.y()
-        deg = math.degrees(math.atan2(dy, dx))
-        angle_from_top = deg + 90
-        if angle_from_top < 0: angle_from_top += 360
-        self.hue = 1.0 - (angle_from_top / 360.0)
-        self.hue = max(0.0, min(1.0, self.hue))
+        dx = pos.x() - self._center.x()
+        dy = pos.y() - self._center.y()
+        # Normalise by the dominant axis so the direction always spans the
+        # full table, whether the cursor is on the ring or dragged far off it
+        m = max(abs(dx), abs(dy)) or 1.0
+        xi = int(round(dx / m * 127)) + 128
+        yi = int(round(dy / m * 127)) + 128
+        hue = float(self._hue_lut[yi, xi])
+        if abs(hue - self.hue) * 360 < 0.5:
+            return  # under half a degree: nothing visible would change
+        self.hue = hue
         self._emit_color()
         self.update()
 
@@ -173,23 +328,38 @@ class ProcreateColorPicker(QWidget):
         r = self.box_rect
         x = max(r.left(), min(r.right(), pos.x()))
         y = max(r.top(), min(r.bottom(), pos.y()))
-        self.sat = (x - r.left()) / r.width()
-        self.val = 1.0 - (y - r.top()) / r.height()
+        sat = (x - r.left()) / r.width()
+        val = 1.0 - (y - r.top()) / r.height()
+        if abs(sat - self.sat) * r.width() < 0.5 and abs(val - self.val) * r.height() < 0.5:
+            return  # indicator would stay on the same pixel
+        old_rect = self._sv_indicator_rect(r)
+        self.sat = sat
+        self.val = val
         self._emit_color()
-        self.update()
+        # Only the SV indicator moved; repaint its old and new spots, not the ring
+        self.update(old_rect.united(self._sv_indicator_rect(r)))
 
     def _emit_color(self):
         self.current_color = QColor.fromHsvF(self.hue, self.sat, self.val)
-        self.colorChanged.emit([self.current_color.redF(), 
-                                self.current_color.greenF(), 
-                                self.current_color.blueF()])
-        self.update()
+        self._pending_rgb = [self.current_color.redF(),
+                             self.current_color.greenF(),
+                             self.current_color.blueF()]
+        if not self._emit_timer.isActive():
+            self._emit_timer.start()
+
+    def _flush_color(self):
+        rgb, self._pending_rgb = self._pending_rgb, None
+        if rgb is not None:
+            self.colorChanged.emit(rgb)
 
 class PaletteButton(QPushButton):
     """Simple color block button"""
     colorSelected = pyqtSignal(list) # [r, g, b] (float)
     colorSaved = pyqtSignal(int) # index
 
+    _PEN_HOVER = QPen(QColor("#fff"), 2)
+    _PEN_NORMAL = QPen(QColor("#888"), 1)
+
     def __init__(self, index, parent=None):
         super().__init__(parent)
         self.index = index
@@ -203,17 +373,30 @@ class PaletteButton(QPushButton):
         self.update_style()
 
     def update_style(self):
+        # Painted directly in paintEvent; a color change is just a repaint, no stylesheet reparse
         r, g, b = [int(c*255) for c in self.color]
-        self.setStyleSheet(f"""
-            QPushButton {{
-                background-color: rgb({r}, {g}, {b});
-                border: 1px solid #888;
-                border-radius: 4px;
-            }}
-            QPushButton:hover {{
-                border: 2px solid #fff;
-            }}
-        """)
+        self._qcolor = QColor(r, g, b)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if self.underMouse():
+            painter.setPen(self._PEN_HOVER)
+            rect = QRectF(self.rect()).adjusted(1, 1, -1, -1)
+        else:
+            painter.setPen(self._PEN_NORMAL)
+            rect = QRectF(self.rect()).adjusted(0.5, 0.5, -0.5, -0.5)
+        painter.setBrush(self._qcolor)
+        painter.drawRoundedRect(rect, 4, 4)
+
+    def enterEvent(self, event):
+        super().enterEvent(event)
+        self.update()
+
+    def leaveEvent(self, event):
+        super().leaveEvent(event)
+        self.update()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -426,6 +609,13 @@ class GradientSlider(QWidget):
     gradientChanged = pyqtSignal(list) # List of (pos, (r,g,b))
     stopSelected = pyqtSignal(list) # current color of selected stop
 
+    # Shared paint resources; handle shapes are relative to the handle tip
+    _PEN_SELECTED = QPen(Qt.GlobalColor.blue, 2)
+    _PEN_HOVER = QPen(Qt.GlobalColor.gray, 2)
+    _PEN_NORMAL = QPen(Qt.GlobalColor.black, 1)
+    _BRUSH_WHITE = QBrush(Qt.GlobalColor.white)
+    _INDICATOR_RECT = QRectF(-5, 16, 10, 10)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMinimumHeight(60)
@@ -442,6 +632,75 @@ class GradientSlider(QWidget):
         self.margin_x = 10
         self.bar_height = 20
         self.handle_size = 12
+        # Stop drags are applied (and gradientChanged emitted) at ~60 Hz
+        self._drag_throttle = _MoveThrottle(self, self._apply_stop_drag)
+
+        # Gradient bar brush and stop colors, rebuilt only when stops or bar change
+        self._grad_key = None
+        self._bar_brush = None
+        self._stop_colors = []
+        self._handle_path = QPainterPath()
+        self._handle_path.moveTo(0, 0)
+        self._handle_path.lineTo(-6, 14)
+        self._handle_path.lineTo(6, 14)
+        self._handle_path.closeSubpath()
+
+        # Position-ordered view of self.stops (same stop lists), re-sorted lazily
+        self._sorted_cache = None
+        self._sorted_dirty = True
+        # Per-stop handle x and hit rect, rebuilt lazily after stop or size changes
+        self._handles = None
+        self._update_bar_geometry()
+
+    def _sorted_stops(self):
+        """Stops ordered by position; call _invalidate_stops() after moving/adding/removing one."""
+        if self._sorted_dirty:
+            self._sorted_cache = sorted(self.stops, key=lambda x: x[0])
+            self._sorted_dirty = False
+        return self._sorted_cache
+
+    def _invalidate_stops(self):
+        self._sorted_dirty = True
+        self._handles = None
+
+    def _handle_geometry(self):
+        """([cx per stop], [hit QRectF per stop]) in self.stops order."""
+        if self._handles is None:
+            w = self._bar_w
+            cy = self._bar_rect.bottom() + 8
+            cxs = [self.margin_x + p * w for p, c in self.stops]
+            hits = [QRectF(cx - 10, cy - 20, 20, 40) for cx in cxs]
+            self._handles = (cxs, hits)
+        return self._handles
+
+    def _handle_at(self, pos):
+        """Index of the stop whose handle is under `pos`, or -1."""
+        for i, hit in enumerate(self._handle_geometry()[1]):
+            if hit.contains(pos):
+                return i
+        return -1
+
+    def _update_bar_geometry(self):
+        """Cache the bar rect (and its width) that paint and hit-tests share."""
+        self._bar_w = self.width() - 2*self.margin_x
+        self._bar_rect = QRectF(self.margin_x, (self.height() - self.bar_height) / 2,
+                                self._bar_w, self.bar_height)
+
+    def resizeEvent(self, event):
+        self._update_bar_geometry()
+        self._handles = None
+        super().resizeEvent(event)
+
+    @staticmethod
+    def _interp_colors(positions, stops):
+        """RGB (0-255 float) at each of `positions`, linear between position-sorted `stops`.
+
+        Positions outside the stops take the nearest end color, like a padded gradient.
+        """
+        xp = np.array([pos for pos, col in stops], dtype=np.float32)
+        cols = np.array([col for pos, col in stops], dtype=np.float32)
+        positions = np.asarray(positions, dtype=np.float32)
+        return np.stack([np.interp(positions, xp, cols[:, c]) for c in range(3)], axis=-1)
 
     def set_current_stop_color(self, rgb_0_1):
         if self.selected_index != -1:
@@ -453,87 +712,74 @@ class GradientSlider(QWidget):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
-        w, h = self.width(), self.height()
-        bar_y = (h - self.bar_height) / 2
-        bar_rect = QRectF(self.margin_x, bar_y, w - 2*self.margin_x, self.bar_height)
+        bar_rect = self._bar_rect
         
         # Draw Gradient Bar
-        grad = QLinearGradient(bar_rect.left(), 0, bar_rect.right(), 0)
-        sorted_stops = sorted(self.stops, key=lambda x: x[0])
-        for pos, col in sorted_stops:
-            grad.setColorAt(pos, QColor(col[0], col[1], col[2]))
+        grad_key = (bar_rect.left(), bar_rect.right(),
+                    tuple((pos, tuple(col)) for pos, col in self.stops))
+        if self._grad_key != grad_key:
+            # One-row image of the gradient, tiled down the bar as a texture brush
+            bar_w = max(1, math.ceil(bar_rect.width()))
+            xs = (np.arange(bar_w, dtype=np.float32) + 0.5) / bar_rect.width()
+            row = (self._interp_colors(xs, self._sorted_stops()) + 0.5).astype(np.uint8)
+            img = QImage(row.tobytes(), bar_w, 1, bar_w * 3, QImage.Format.Format_RGB888).copy()
+            self._bar_brush = QBrush(img)
+            self._bar_brush.setTransform(QTransform.fromTranslate(bar_rect.left(), 0))
+            self._stop_colors = [QColor(col[0], col[1], col[2]) for pos, col in self.stops]
+            self._grad_key = grad_key
             
-        painter.setBrush(grad)
+        painter.setBrush(self._bar_brush)
         painter.setPen(Qt.PenStyle.NoPen)
         painter.drawRoundedRect(bar_rect, 4, 4)
         
-        # Draw Handles
-        for i, (pos, col) in enumerate(self.stops):
-            cx = self.margin_x + pos * bar_rect.width()
-            cy = bar_y + self.bar_height + 8
-            
-            # Triangle shape
-            path = QPainterPath()
-            path.moveTo(cx, bar_y + self.bar_height)
-            path.lineTo(cx - 6, cy + 6)
-            path.lineTo(cx + 6, cy + 6)
-            path.closeSubpath()
-            
-            # Color indicator box
-            indicator_rect = QRectF(cx - 5, cy + 8, 10, 10)
-            
-            # Selection Highlight
-            if i == self.selected_index:
-                painter.setPen(QPen(Qt.GlobalColor.blue, 2))
-            elif i == self.hover_index:
-                painter.setPen(QPen(Qt.GlobalColor.gray, 2))
-            else:
-                painter.setPen(QPen(Qt.GlobalColor.black, 1))
-            
-            painter.setBrush(Qt.GlobalColor.white)
-            painter.drawPath(path)
-            
-            painter.setBrush(QColor(col[0], col[1], col[2]))
-            painter.drawRect(indicator_rect)
+        # Draw Handles (triangle + color indicator box, drawn at the handle tip).
+        # Triangles are antialiased; the axis-aligned indicator boxes are not.
+        tip_y = bar_rect.bottom()
+        cxs = self._handle_geometry()[0]
+        painter.setBrush(self._BRUSH_WHITE)
+        for i, cx in enumerate(cxs):
+            painter.setPen(self._handle_pen(i))
+            painter.translate(cx, tip_y)
+            painter.drawPath(self._handle_path)
+            painter.translate(-cx, -tip_y)
+        
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+        for i, cx in enumerate(cxs):
+            painter.setPen(self._handle_pen(i))
+            painter.setBrush(self._stop_colors[i])
+            painter.translate(cx, tip_y)
+            painter.drawRect(self._INDICATOR_RECT)
+            painter.translate(-cx, -tip_y)
+
+    def _handle_pen(self, i):
+        # Selection Highlight
+        if i == self.selected_index:
+            return self._PEN_SELECTED
+        if i == self.hover_index:
+            return self._PEN_HOVER
+        return self._PEN_NORMAL
 
     def mousePressEvent(self, event):
         pos = event.position()
-        w = self.width() - 2*self.margin_x
-        bar_rect = QRectF(self.margin_x, (self.height()-self.bar_height)/2, w, self.bar_height)
         
         # Check handles
-        clicked_handle = -1
-        for i, (p, c) in enumerate(self.stops):
-            cx = self.margin_x + p * w
-            cy = bar_rect.bottom() + 8
-            # Hit area around handle
-            if abs(pos.x() - cx) < 10 and abs(pos.y() - cy) < 20:
-                clicked_handle = i
-                break
+        clicked_handle = self._handle_at(pos)
         
         if clicked_handle != -1:
             self.selected_index = clicked_handle
             self.dragging_index = clicked_handle
             col = self.stops[self.selected_index][1]
             self.stopSelected.emit([c/255.0 for c in col])
-        elif bar_rect.contains(pos):
+        elif self._bar_rect.contains(pos):
             # Add stop
-            rel_x = (pos.x() - self.margin_x) / w
+            rel_x = (pos.x() - self.margin_x) / self._bar_w
             rel_x = max(0.0, min(1.0, rel_x))
             
-            # Interpolate color roughly
-            new_col = [128, 128, 128] # Default
-            # Simple find neighbor
-            sorted_s = sorted(self.stops, key=lambda x: x[0])
-            for k in range(len(sorted_s)-1):
-                if sorted_s[k][0] <= rel_x <= sorted_s[k+1][0]:
-                    ratio = (rel_x - sorted_s[k][0]) / (sorted_s[k+1][0] - sorted_s[k][0])
-                    c1 = sorted_s[k][1]
-                    c2 = sorted_s[k+1][1]
-                    new_col = [int(c1[j]*(1-ratio) + c2[j]*ratio) for j in range(3)]
-                    break
+            # New stop takes the gradient's current color at that point
+            new_col = [int(c) for c in self._interp_colors([rel_x], self._sorted_stops())[0]]
             
             self.stops.append([rel_x, new_col])
+            self._invalidate_stops()
             self.selected_index = len(self.stops) - 1
             self.dragging_index = self.selected_index
             self.stopSelected.emit([c/255.0 for c in new_col])
@@ -543,47 +789,42 @@ class GradientSlider(QWidget):
 
     def mouseMoveEvent(self, event):
         pos = event.position()
-        w = self.width() - 2*self.margin_x
         
         if self.dragging_index != -1:
-            rel_x = (pos.x() - self.margin_x) / w
-            rel_x = max(0.0, min(1.0, rel_x))
-            self.stops[self.dragging_index][0] = rel_x
-            self.gradientChanged.emit(self.stops)
-            self.update()
+            self._drag_throttle(pos)
             return
 
-        # Hover check
-        self.hover_index = -1
-        bar_rect = QRectF(self.margin_x, (self.height()-self.bar_height)/2, w, self.bar_height)
-        for i, (p, c) in enumerate(self.stops):
-            cx = self.margin_x + p * w
-            cy = bar_rect.bottom() + 8
-            if abs(pos.x() - cx) < 10 and abs(pos.y() - cy) < 20:
-                self.hover_index = i
-                break
-        self.update()
+        # Hover check; repaint only when the hovered handle changes
+        hover_index = self._handle_at(pos)
+        if hover_index != self.hover_index:
+            self.hover_index = hover_index
+            self.update()
 
     def mouseReleaseEvent(self, event):
+        self._drag_throttle.flush()
         self.dragging_index = -1
 
+    def _apply_stop_drag(self, pos):
+        if self.dragging_index == -1:
+            return
+        rel_x = (pos.x() - self.margin_x) / self._bar_w
+        rel_x = max(0.0, min(1.0, rel_x))
+        self.stops[self.dragging_index][0] = rel_x
+        self._invalidate_stops()
+        self.gradientChanged.emit(self.stops)
+        self.update()
+
     def mouseDoubleClickEvent(self, event):
         # Remove stop if clicked, but keep at least 2
         if len(self.stops) <= 2: return
         
-        pos = event.position()
-        w = self.width() - 2*self.margin_x
-        bar_rect = QRectF(self.margin_x, (self.height()-self.bar_height)/2, w, self.bar_height)
-        
-        for i, (p, c) in enumerate(self.stops):
-            cx = self.margin_x + p * w
-            cy = bar_rect.bottom() + 8
-            if abs(pos.x() - cx) < 10 and abs(pos.y() - cy) < 20:
-                self.stops.pop(i)
-                self.selected_index = -1
-                self.gradientChanged.emit(self.stops)
-                self.update()
-                break
+        i = self._handle_at(event.position())
+        if i != -1:
+            self.stops.pop(i)
+            self._invalidate_stops()
+            self.selected_index = -1
+            self.gradientChanged.emit(self.stops)
+            self.update()
 
 # === Generator Status Widget ===
 class GeneratorStatusWidget(QFrame):
@@ -675,21 +916,34 @@ class GeneratorStatusWidget(QFrame):
         self.lbl_preview.clear()
         self.lbl_preview.setText("Generating...")
         self.lbl_info.setText("Please wait...")
-        self.btn_container.hide()
         self.current_image = None
-        self.adjustSize()
+        # Width and preview are fixed; only the action row changes the height
+        if not self.btn_container.isHidden():
+            self.btn_container.hide()
+            self.adjustSize()
 
     def finish_loading(self, image):
         self.current_image = image
         self.lbl_title.setText("Result Ready")
         self.lbl_info.setText("Generation successful.")
         
-        pix = QPixmap.fromImage(image)
-        scaled = pix.scaled(self.lbl_preview.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-        self.lbl_preview.setPixmap(scaled)
+        self.lbl_preview.setPixmap(self._preview_pixmap(image))
         
-        self.btn_container.show()
-        self.adjustSize()
+        if self.btn_container.isHidden():
+            self.btn_container.show()
+            self.adjustSize()
+
+    def _preview_pixmap(self, image):
+        """Preview-sized pixmap of `image`, cached in QPixmapCache by image identity."""
+        size = self.lbl_preview.size()
+        key = f"gen_preview/{image.cacheKey()}/{size.width()}x{size.height()}"
+        pm = QPixmapCache.find(key)
+        if pm is None:
+            # Scale the QImage first so only the preview-sized copy becomes a pixmap
+            pm = QPixmap.fromImage(image.scaled(size, Qt.AspectRatioMode.KeepAspectRatio,
+                                                Qt.TransformationMode.SmoothTransformation))
+            QPixmapCache.insert(key, pm)
+        return pm
 
     def show_error(self, msg):
         from PyQt6.QtWidgets import QMessageBox